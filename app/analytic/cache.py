@@ -0,0 +1,88 @@
+from typing import Awaitable, Callable, Iterable, Optional
+
+import orjson
+
+import metrics
+from config import global_settings
+from db.redis import RedisUnavailable, redis_client
+from log import logger
+
+
+def version_key(scope: str, scope_id: int) -> str:
+    return f"analytic_version:{scope}:{scope_id}"
+
+
+def response_key(endpoint: str, scope: str, scope_id: int, version: int, **args) -> str:
+    args = ':'.join(f"{name}={value}" for name, value in sorted(args.items()))
+
+    return f"analytic:{endpoint}:{scope}:{scope_id}:v{version}:{args}"
+
+
+class AnalyticCache:
+    # Responses are keyed by the version of the company or user they are computed from.
+    # A new result bumps the version, so stale entries are never read again and just expire.
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_compute(
+            self,
+            endpoint: str,
+            scope: str,
+            scope_id: int,
+            compute: Callable[[], Awaitable],
+            **args
+    ):
+        try:
+            async with redis_client() as redis:
+                version = int(await redis.get(version_key(scope, scope_id)) or 0)
+                key = response_key(endpoint, scope, scope_id, version, **args)
+
+                raw = await redis.get(key)
+
+        except RedisUnavailable:
+            return await compute()
+
+        if raw is not None:
+            self.hits += 1
+
+            return orjson.loads(raw)
+
+        self.misses += 1
+
+        response = await compute()
+
+        try:
+            async with redis_client() as redis:
+                await redis.setex(key, self.ttl, orjson.dumps(response, option=orjson.OPT_NON_STR_KEYS))
+
+        except RedisUnavailable:
+            pass
+
+        return response
+
+    async def bump(self, id_company: Optional[int] = None, id_users: Iterable[int] = ()):
+        keys = [version_key('user', id_user) for id_user in id_users]
+
+        if id_company is not None:
+            keys.append(version_key('company', id_company))
+
+        try:
+            async with redis_client() as redis, redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.incr(key)
+
+                await pipe.execute()
+
+        except RedisUnavailable:
+            logger.warning(f"Analytic versions {', '.join(keys)} were not bumped, redis is unavailable")
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+analytic_cache = AnalyticCache(ttl=global_settings.analytic_cache_ttl)
+
+metrics.register('analytic_cache', analytic_cache.stats)
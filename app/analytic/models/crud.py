@@ -1,41 +1,240 @@
+from sqlalchemy import Float, cast, select, func, and_, delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from utils.rating_calculation import get_rating
+
+def running_sum_upsert(model, index_elements: list, **values):
+    # Adds the result to the stored sums in one atomic INSERT ... ON CONFLICT DO UPDATE,
+    # so concurrent submissions of the same user never lose an increment
+    query = insert(model).values(rating=values['sum_correct'] / values['sum_questions'], **values)
+
+    sum_correct = model.sum_correct + query.excluded.sum_correct
+    sum_questions = model.sum_questions + query.excluded.sum_questions
+
+    return query.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={
+            'sum_correct': sum_correct,
+            'sum_questions': sum_questions,
+            'rating': cast(sum_correct, Float) / sum_questions,
+            'updated_at': query.excluded.updated_at,
+        }
+    )
 
 
 class AverageScoreCompanyCrud:
     @staticmethod
-    async def set_company_rating(db: AsyncSession, user, company_id: int):
-        from quiz.models.models import ResultTestModel
+    async def add_company_result(db: AsyncSession, result_test):
         from analytic.models.models import AverageScoreCompanyModel
 
-        results = await ResultTestModel.get_by_fields(db, return_single=False, id_user=user.id, id_company=company_id)
+        await db.execute(running_sum_upsert(
+            AverageScoreCompanyModel,
+            [AverageScoreCompanyModel.id_user, AverageScoreCompanyModel.id_company],
+            id_user=result_test.id_user,
+            id_company=result_test.id_company,
+            sum_correct=result_test.count_correct_answers,
+            sum_questions=result_test.count_questions
+        ))
 
-        rating = get_rating(results)
 
-        average_score_company = await AverageScoreCompanyModel.get_by_fields(db, id_user=user.id, id_company=company_id)
+class AverageScoreGlobalCrud:
+    @staticmethod
+    async def add_global_result(db: AsyncSession, result_test):
+        from analytic.models.models import AverageScoreGlobalModel
 
-        if average_score_company:
-            await average_score_company.update(db, {'rating': rating})
-        else:
-            average_company = AverageScoreCompanyModel(id_user=user.id, id_company=company_id, rating=rating)
-            await average_company.create(db)
+        await db.execute(running_sum_upsert(
+            AverageScoreGlobalModel,
+            [AverageScoreGlobalModel.id_user],
+            id_user=result_test.id_user,
+            sum_correct=result_test.count_correct_answers,
+            sum_questions=result_test.count_questions
+        ))
 
 
-class AverageScoreGlobalCrud:
+class DailyScoreRollupCrud:
     @staticmethod
-    async def set_global_rating(db: AsyncSession, user):
-        from quiz.models.models import ResultTestModel
-        from analytic.models.models import AverageScoreGlobalModel
+    async def add_daily_result(db: AsyncSession, result_test):
+        from analytic.models.models import DailyScoreRollupModel
+
+        query = insert(DailyScoreRollupModel).values(
+            id_company=result_test.id_company,
+            id_user=result_test.id_user,
+            id_quiz=result_test.id_quiz,
+            day=result_test.created_at.date(),
+            sum_correct=result_test.count_correct_answers,
+            sum_questions=result_test.count_questions
+        )
+
+        await db.execute(query.on_conflict_do_update(
+            index_elements=[
+                DailyScoreRollupModel.id_company,
+                DailyScoreRollupModel.id_user,
+                DailyScoreRollupModel.id_quiz,
+                DailyScoreRollupModel.day,
+            ],
+            set_={
+                'sum_correct': DailyScoreRollupModel.sum_correct + query.excluded.sum_correct,
+                'sum_questions': DailyScoreRollupModel.sum_questions + query.excluded.sum_questions,
+                'updated_at': query.excluded.updated_at,
+            }
+        ))
+
+    @classmethod
+    async def get_totals_by_day(cls, db: AsyncSession, **kwargs) -> list:
+        # One row per day with the sums over every rollup row matching the filters
+        query = (
+            select(cls.day, func.sum(cls.sum_correct), func.sum(cls.sum_questions))
+            .where(and_(*[getattr(cls, field) == value for field, value in kwargs.items()]))
+            .group_by(cls.day)
+            .order_by(cls.day)
+        )
+
+        result = await db.execute(query)
+
+        return result.all()
+
+
+class LastPassCrud:
+    @staticmethod
+    async def add_last_pass(db: AsyncSession, result_test):
+        from analytic.models.models import LastPassModel
+
+        query = insert(LastPassModel).values(
+            id_user=result_test.id_user,
+            id_quiz=result_test.id_quiz,
+            id_company=result_test.id_company,
+            passed_at=result_test.created_at,
+            count_correct_answers=result_test.count_correct_answers,
+            count_questions=result_test.count_questions
+        )
+
+        # A pass committed late must not replace a newer one
+        await db.execute(query.on_conflict_do_update(
+            index_elements=[LastPassModel.id_user, LastPassModel.id_quiz, LastPassModel.id_company],
+            set_={
+                'passed_at': query.excluded.passed_at,
+                'count_correct_answers': query.excluded.count_correct_answers,
+                'count_questions': query.excluded.count_questions,
+                'updated_at': query.excluded.updated_at,
+            },
+            where=LastPassModel.passed_at < query.excluded.passed_at
+        ))
+
+    @classmethod
+    async def get_user_last_passes(cls, db: AsyncSession, id_user: int) -> list:
+        query = (
+            select(cls.id_quiz, cls.passed_at.label('date_last_pass'))
+            .where(cls.id_user == id_user)
+            .order_by(cls.id)
+        )
+
+        result = await db.execute(query)
+
+        return result.all()
+
+    @classmethod
+    async def get_company_last_passes(cls, db: AsyncSession, id_company: int) -> list:
+        query = (
+            select(cls.id_user, func.max(cls.passed_at).label('date_last_pass'))
+            .where(cls.id_company == id_company)
+            .group_by(cls.id_user)
+            .order_by(cls.id_user)
+        )
+
+        result = await db.execute(query)
+
+        return result.all()
+
+
+class QuestionStatCrud:
+    @staticmethod
+    async def add_quiz_result(db: AsyncSession, quiz, answers: list, checking_answers: list):
+        # answers are the submitted option indexes per question, quiz has questions.answers loaded
+        from analytic.models.models import QuestionStatModel, AnswerStatModel
+
+        query = insert(QuestionStatModel).values([
+            {
+                'id_question': question.id,
+                'id_quiz': quiz.id,
+                'id_company': quiz.id_company,
+                'attempts': 1,
+                'correct': int(is_correct),
+            }
+            for question, is_correct in zip(quiz.questions, checking_answers)
+        ])
+
+        await db.execute(query.on_conflict_do_update(
+            index_elements=[QuestionStatModel.id_question],
+            set_={
+                'attempts': QuestionStatModel.attempts + query.excluded.attempts,
+                'correct': QuestionStatModel.correct + query.excluded.correct,
+                'updated_at': query.excluded.updated_at,
+            }
+        ))
+
+        query = insert(AnswerStatModel).values([
+            {'id_answer': question.answers[item].id, 'id_question': question.id, 'selections': 1}
+            for question, answer in zip(quiz.questions, answers)
+            for item in answer
+        ])
+
+        await db.execute(query.on_conflict_do_update(
+            index_elements=[AnswerStatModel.id_answer],
+            set_={
+                'selections': AnswerStatModel.selections + query.excluded.selections,
+                'updated_at': query.excluded.updated_at,
+            }
+        ))
+
+    @staticmethod
+    async def reset(db: AsyncSession, id_question: int):
+        from analytic.models.models import QuestionStatModel, AnswerStatModel
+
+        await db.execute(delete(QuestionStatModel).where(QuestionStatModel.id_question == id_question))
+        await db.execute(delete(AnswerStatModel).where(AnswerStatModel.id_question == id_question))
+
+    @classmethod
+    async def get_company_stats(cls, db: AsyncSession, id_company: int, id_quiz: int = None) -> list:
+        from analytic.models.models import AnswerStatModel
+        from quiz.models.models import QuestionModel, AnswerModel
+
+        filters = [cls.id_company == id_company]
+
+        if id_quiz is not None:
+            filters.append(cls.id_quiz == id_quiz)
+
+        questions = (await db.execute(
+            select(cls.id_question, cls.id_quiz, QuestionModel.question, cls.attempts, cls.correct)
+            .join(QuestionModel, QuestionModel.id == cls.id_question)
+            .where(*filters)
+            .order_by(cls.id_question)
+        )).all()
 
-        results = await ResultTestModel.get_by_fields(db, return_single=False, id_user=user.id)
+        if not questions:
+            return []
 
-        rating = get_rating(results)
+        answers = (await db.execute(
+            select(
+                AnswerModel.id.label('id_answer'),
+                AnswerModel.id_question,
+                AnswerModel.answer,
+                AnswerModel.is_correct,
+                func.coalesce(AnswerStatModel.selections, 0).label('selections')
+            )
+            .outerjoin(AnswerStatModel, AnswerStatModel.id_answer == AnswerModel.id)
+            .where(AnswerModel.id_question.in_([question.id_question for question in questions]))
+            .order_by(AnswerModel.id)
+        )).all()
 
-        average_score_global = await AverageScoreGlobalModel.get_by_fields(db, id_user=user.id)
+        answers_by_question = {}
+        for answer in answers:
+            answers_by_question.setdefault(answer.id_question, []).append(answer._asdict())
 
-        if average_score_global:
-            await average_score_global.update(db, {'rating': rating})
-        else:
-            average_company = AverageScoreGlobalModel(id_user=user.id, rating=rating)
-            await average_company.create(db)
+        return [
+            {
+                **question._asdict(),
+                'rating': question.correct / question.attempts,
+                'answers': answers_by_question.get(question.id_question, []),
+            }
+            for question in questions
+        ]
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float
+from sqlalchemy import Column, Integer, ForeignKey, Float, UniqueConstraint, Date, Index, DateTime
 
 from db.models import BaseModel
-from analytic.models.crud import AverageScoreCompanyCrud, AverageScoreGlobalCrud
+from analytic.models.crud import AverageScoreCompanyCrud, AverageScoreGlobalCrud, DailyScoreRollupCrud, LastPassCrud, QuestionStatCrud
 
 
 class AverageScoreCompanyModel(BaseModel, AverageScoreCompanyCrud):
@@ -10,6 +10,10 @@ class AverageScoreCompanyModel(BaseModel, AverageScoreCompanyCrud):
     id_user = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
     id_company = Column(Integer, ForeignKey("company.id", ondelete="CASCADE"), nullable=False)
     rating = Column(Float, nullable=False)
+    sum_correct = Column(Integer, nullable=False, default=0)
+    sum_questions = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint('id_user', 'id_company'),)
 
 
 class AverageScoreGlobalModel(BaseModel, AverageScoreGlobalCrud):
@@ -17,3 +21,54 @@ class AverageScoreGlobalModel(BaseModel, AverageScoreGlobalCrud):
 
     id_user = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, unique=True)
     rating = Column(Float, nullable=False)
+    sum_correct = Column(Integer, nullable=False, default=0)
+    sum_questions = Column(Integer, nullable=False, default=0)
+
+
+class DailyScoreRollupModel(BaseModel, DailyScoreRollupCrud):
+    __tablename__ = "daily_score_rollup"
+
+    id_company = Column(Integer, ForeignKey("company.id", ondelete="CASCADE"), nullable=False)
+    id_user = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    id_quiz = Column(Integer, ForeignKey("quiz.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    sum_correct = Column(Integer, nullable=False, default=0)
+    sum_questions = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint('id_company', 'id_user', 'id_quiz', 'day'),
+        Index('ix_daily_score_rollup_id_user_id_quiz_day', 'id_user', 'id_quiz', 'day'),
+    )
+
+
+class LastPassModel(BaseModel, LastPassCrud):
+    __tablename__ = "last_pass"
+
+    id_user = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    id_quiz = Column(Integer, ForeignKey("quiz.id", ondelete="CASCADE"), nullable=False)
+    id_company = Column(Integer, ForeignKey("company.id", ondelete="CASCADE"), nullable=False, index=True)
+    passed_at = Column(DateTime(timezone=True), nullable=False)
+    count_correct_answers = Column(Integer, nullable=False)
+    count_questions = Column(Integer, nullable=False)
+
+    __table_args__ = (UniqueConstraint('id_user', 'id_quiz', 'id_company'),)
+
+
+class QuestionStatModel(BaseModel, QuestionStatCrud):
+    __tablename__ = "question_stat"
+
+    id_question = Column(Integer, ForeignKey("question.id", ondelete="CASCADE"), nullable=False, unique=True)
+    id_quiz = Column(Integer, ForeignKey("quiz.id", ondelete="CASCADE"), nullable=False)
+    id_company = Column(Integer, ForeignKey("company.id", ondelete="CASCADE"), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index('ix_question_stat_id_company_id_quiz', 'id_company', 'id_quiz'),)
+
+
+class AnswerStatModel(BaseModel):
+    __tablename__ = "answer_stat"
+
+    id_answer = Column(Integer, ForeignKey("answer.id", ondelete="CASCADE"), nullable=False, unique=True)
+    id_question = Column(Integer, ForeignKey("question.id", ondelete="CASCADE"), nullable=False, index=True)
+    selections = Column(Integer, nullable=False, default=0)
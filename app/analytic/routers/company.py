@@ -1,16 +1,18 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import Depends, status, HTTPException, APIRouter
+from fastapi import Depends, status, HTTPException, APIRouter, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from analytic.schemas import QuizAnalyticByTime, UserLastPassQuiz
+from analytic.cache import analytic_cache
+from analytic.models.models import DailyScoreRollupModel, LastPassModel, QuestionStatModel
+from analytic.schemas import QuizAnalyticByTime, UserLastPassQuiz, CompanyScoreSummary, QuestionStatSchema
 from auth.auth import jwt_bearer
 from company.models.models import CompanyModel
 from db.database import get_async_session
 from quiz.models.models import ResultTestModel
-from quiz.schemas import ResultTestSchema
 from user.models.models import UserModel
-from utils.analytic import avarage_quiz_score_by_time, company_users_last_pass_quizzes
+from utils.analytic import running_score_by_day
+from utils.score_engine import ScoreFrame, Bucket
 
 router = APIRouter(tags=['Company analytic'])
 
@@ -21,19 +23,22 @@ async def get_users_analytic(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_user_manager(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No permission')
 
-    results = await ResultTestModel.get_by_fields(db, return_single=False, id_company=company.id)
+    async def compute():
+        totals = await DailyScoreRollupModel.get_totals_by_day(db, id_company=company.id)
 
-    if not results:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
+        if not totals:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
+
+        analytic = running_score_by_day(totals)
 
-    analytic = avarage_quiz_score_by_time([ResultTestSchema.model_validate(result).model_dump() for result in results])
+        return list(analytic)
 
-    return analytic
+    return await analytic_cache.get_or_compute('users_analytic', 'company', company.id, compute)
 
 
 @router.get("/{company_id}/user_analytic/{user_id}/", response_model=List[QuizAnalyticByTime])
@@ -43,19 +48,22 @@ async def get_user_analytic(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_user_manager(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No permission')
 
-    results = await ResultTestModel.get_by_fields(db, return_single=False, id_user=user_id, id_company=company.id)
+    async def compute():
+        totals = await DailyScoreRollupModel.get_totals_by_day(db, id_company=company.id, id_user=user_id)
 
-    if not results:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
+        if not totals:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
+
+        analytic = running_score_by_day(totals)
 
-    analytic = avarage_quiz_score_by_time([ResultTestSchema.model_validate(result).model_dump() for result in results])
+        return list(analytic)
 
-    return analytic
+    return await analytic_cache.get_or_compute('user_analytic', 'company', company.id, compute, user_id=user_id)
 
 
 @router.get("/{company_id}/last_pass_quizzes/", response_model=List[UserLastPassQuiz])
@@ -64,16 +72,73 @@ async def get_date_last_pass_company_quizzes(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_user_manager(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No permission')
 
-    results = await ResultTestModel.get_by_fields(db, return_single=False, id_company=company_id)
+    async def compute():
+        rows = await LastPassModel.get_company_last_passes(db, company.id)
 
-    if not results:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
+        if not rows:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
+
+        return [row._asdict() for row in rows]
+
+    return await analytic_cache.get_or_compute('company_last_pass_quizzes', 'company', company.id, compute)
+
+
+@router.get("/{company_id}/score_summary/", response_model=CompanyScoreSummary)
+async def get_company_score_summary(
+        company_id: int,
+        bucket: Bucket = 'day',
+        bins: int = Query(10, ge=1, le=100),
+        user: UserModel = Depends(jwt_bearer),
+        db: AsyncSession = Depends(get_async_session)
+):
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
+
+    if not company.is_user_manager(user.id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No permission')
 
-    analytic = company_users_last_pass_quizzes([ResultTestSchema.model_validate(result).model_dump() for result in results])
+    async def compute():
+        rows = await ResultTestModel.get_columns(
+            db,
+            ('created_at', 'id_user', 'id_quiz', 'count_correct_answers', 'count_questions'),
+            id_company=company.id
+        )
+
+        if not rows:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
+
+        frame = ScoreFrame.from_rows(rows)
+
+        return {
+            'by_time': frame.by_time(bucket),
+            'users': frame.by_user(),
+            'quizzes': frame.by_quiz(),
+            'percentiles': frame.percentiles(),
+            'histogram': frame.histogram(bins),
+        }
+
+    return await analytic_cache.get_or_compute('score_summary', 'company', company.id, compute, bucket=bucket, bins=bins)
+
+
+@router.get("/{company_id}/question_stats/", response_model=List[QuestionStatSchema])
+async def get_company_question_stats(
+        company_id: int,
+        quiz_id: Optional[int] = None,
+        user: UserModel = Depends(jwt_bearer),
+        db: AsyncSession = Depends(get_async_session)
+):
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
+
+    if not company.is_user_manager(user.id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No permission')
+
+    stats = await QuestionStatModel.get_company_stats(db, company.id, quiz_id)
+
+    if not stats:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
 
-    return analytic
+    return stats
@@ -3,14 +3,13 @@ from typing import List
 from fastapi import Depends, status, HTTPException, APIRouter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from analytic.models.models import AverageScoreGlobalModel
+from analytic.cache import analytic_cache
+from analytic.models.models import AverageScoreGlobalModel, DailyScoreRollupModel, LastPassModel
 from analytic.schemas import GlobalRatingSchema, QuizAnalyticByTime, LastPassQuizzes
 from auth.auth import jwt_bearer
 from db.database import get_async_session
-from quiz.models.models import ResultTestModel
-from quiz.schemas import ResultTestSchema
 from user.models.models import UserModel
-from utils.analytic import avarage_quiz_score_by_time, user_last_pass_quizzes
+from utils.analytic import running_score_by_day
 
 router = APIRouter(tags=['User analytic'])
 
@@ -38,14 +37,17 @@ async def get_quiz_analytic(
     if not user.can_read(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
 
-    results = await ResultTestModel.get_by_fields(db, return_single=False, id_user=user_id, id_quiz=quiz_id)
+    async def compute():
+        totals = await DailyScoreRollupModel.get_totals_by_day(db, id_user=user_id, id_quiz=quiz_id)
 
-    if not results:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
+        if not totals:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
+
+        analytic = running_score_by_day(totals)
 
-    analytic = avarage_quiz_score_by_time([ResultTestSchema.model_validate(result).model_dump() for result in results])
+        return list(analytic)
 
-    return analytic
+    return await analytic_cache.get_or_compute('quiz_analytic', 'user', user_id, compute, quiz_id=quiz_id)
 
 
 @router.get("/{user_id}/last_pass_quizzes/", response_model=List[LastPassQuizzes])
@@ -57,11 +59,12 @@ async def get_date_last_pass_quizzes(
     if not user.can_read(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
 
-    results = await ResultTestModel.get_by_fields(db, return_single=False, id_user=user_id)
+    async def compute():
+        rows = await LastPassModel.get_user_last_passes(db, user_id)
 
-    if not results:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
+        if not rows:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User haven't taken the quizzes yet")
 
-    analytic = user_last_pass_quizzes([ResultTestSchema.model_validate(result).model_dump() for result in results])
+        return [row._asdict() for row in rows]
 
-    return analytic
+    return await analytic_cache.get_or_compute('user_last_pass_quizzes', 'user', user_id, compute)
@@ -1,4 +1,5 @@
 from datetime import date, datetime
+from typing import Dict, List
 
 from pydantic import BaseModel
 
@@ -31,3 +32,45 @@ class LastPassQuizzes(BaseModel):
 class UserLastPassQuiz(BaseModel):
     id_user: int
     date_last_pass: datetime
+
+
+class UserScoreSummary(BaseModel):
+    id_user: int
+    rating: float
+    results: int
+
+
+class QuizScoreSummary(BaseModel):
+    id_quiz: int
+    rating: float
+    results: int
+
+
+class ScoreHistogram(BaseModel):
+    edges: List[float]
+    counts: List[int]
+
+
+class CompanyScoreSummary(BaseModel):
+    by_time: List[QuizAnalyticByTime]
+    users: List[UserScoreSummary]
+    quizzes: List[QuizScoreSummary]
+    percentiles: Dict[int, float]
+    histogram: ScoreHistogram
+
+
+class AnswerStatSchema(BaseModel):
+    id_answer: int
+    answer: str
+    is_correct: bool
+    selections: int
+
+
+class QuestionStatSchema(BaseModel):
+    id_question: int
+    id_quiz: int
+    question: str
+    attempts: int
+    correct: int
+    rating: float
+    answers: List[AnswerStatSchema]
@@ -6,6 +6,9 @@ import jwt
 from fastapi import Request, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from config import global_settings
+from auth.claims import claims_cache, verify_stats
+from auth.jwks import jwks_cache
+from auth.principal import principal_cache
 from auth.schemas import TokenSchema
 from db.database import async_session
 from user.models.models import UserModel
@@ -13,6 +16,8 @@ from utils.hashing import Hasher
 
 
 class JWTBearer(HTTPBearer):
+    session_maker = async_session
+
     def __init__(self):
         super(JWTBearer, self).__init__()
 
@@ -32,53 +37,80 @@ class JWTBearer(HTTPBearer):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid authorization code.")
 
     async def verify(self, token: str) -> Optional[UserModel]:
-        result_jwt = await self.verify_jwt(token)
+        cached = claims_cache.get(token)
 
-        if result_jwt:
-            return result_jwt
+        if cached:
+            path, payload = cached
+            verify_stats[path].cache_hits += 1
 
-        result_auth0 = await self.verify_auth0(token)
+        else:
+            path = self.token_path(token)
 
-        if result_auth0:
-            return result_auth0
+            if not path:
+                return None
 
-        return None
+            started = time.perf_counter()
+            payload = self.decode_jwt(token) if path == 'jwt' else await self.decode_auth0(token)
+            verify_stats[path].observe(started, payload is not None)
 
-    async def verify_jwt(self, token: str) -> Optional[UserModel]:
-        payload = self.decode_jwt(token)
+            if not payload:
+                return None
 
-        if not payload:
-            return None
+            claims_cache.put(token, path, payload, payload['expires'] if path == 'jwt' else payload['exp'])
 
-        async with async_session() as db:
-            user = await UserModel.get_by_fields(db, email=payload['email'])
+        if path == 'jwt':
+            return await self.get_principal(payload['email'])
 
-        if not user:
+        return await self.get_auth0_principal(payload)
+
+    @staticmethod
+    def token_path(token: str) -> Optional[str]:
+        # Routes each token to the one verifier that can accept it, without checking the signature yet
+        try:
+            algorithm = jwt.get_unverified_header(token).get('alg')
+            claims = jwt.decode(token, options={"verify_signature": False})
+
+        except jwt.exceptions.PyJWTError:
             return None
 
-        return user
+        if algorithm == global_settings.jwt_algorithm:
+            return 'jwt'
 
-    async def verify_auth0(self, token: str) -> Optional[UserModel]:
-        payload = self.decode_auth0(token)
+        if algorithm in global_settings.auth0_algorithms.split(',') and claims.get('iss') == global_settings.auth0_issuer:
+            return 'auth0'
 
-        if not payload:
-            return None
+        return None
 
-        async with async_session() as db:
-            user = await UserModel.get_by_fields(db, email=payload['email'])
+    async def get_auth0_principal(self, payload: dict) -> UserModel:
+        user = await self.get_principal(payload['email'])
 
-            if user:
-                return user
+        if user:
+            return user
 
+        async with self.session_maker() as db:
             new_user = UserModel(
                 email=payload['email'],
                 username=payload['email'],
-                hashed_password=Hasher.get_password_hash(payload['email'])
+                hashed_password=await Hasher.get_password_hash_async(payload['email'])
             )
 
             await new_user.create(db)
 
-        return new_user
+        return await principal_cache.put(new_user)
+
+    async def get_principal(self, email: str) -> Optional[UserModel]:
+        user = await principal_cache.get(email)
+
+        if user:
+            return user
+
+        async with self.session_maker() as db:
+            user = await UserModel.get_by_fields(db, email=email)
+
+        if not user:
+            return None
+
+        return await principal_cache.put(user)
 
     @staticmethod
     def sign_jwt(email: str) -> TokenSchema:
@@ -95,33 +127,31 @@ class JWTBearer(HTTPBearer):
     def decode_jwt(token: str) -> Optional[dict]:
         try:
             decoded_token = jwt.decode(token, global_settings.jwt_secret, algorithms=global_settings.jwt_algorithm)
-            return decoded_token if decoded_token["expires"] >= time.time() else None
-
-        except jwt.exceptions.DecodeError as err:
-            return None
+            return decoded_token if decoded_token.get("expires", 0) >= time.time() else None
 
-        except jwt.exceptions.InvalidAlgorithmError as err:
+        except jwt.exceptions.PyJWTError:
             return None
 
     @staticmethod
-    def decode_auth0(token: str) -> Optional[dict]:
+    async def decode_auth0(token: str) -> Optional[dict]:
         try:
-            jwks_url = f'https://{global_settings.auth0_domain}/.well-known/jwks.json'
-            jwks_client = jwt.PyJWKClient(jwks_url)
+            signing_key = await jwks_cache.get_key(jwt.get_unverified_header(token).get('kid'))
 
-            signing_key = jwks_client.get_signing_key_from_jwt(token).key
+            if not signing_key:
+                return None
 
             decoded_token = jwt.decode(
                 token,
-                signing_key,
+                signing_key.key,
                 algorithms=global_settings.auth0_algorithms,
                 audience=global_settings.auth0_api_audience,
                 issuer=global_settings.auth0_issuer,
+                options={"require": ["exp"]},
             )
 
             return decoded_token if decoded_token["exp"] >= time.time() else None
 
-        except:
+        except jwt.exceptions.PyJWTError:
             return None
 
 
@@ -0,0 +1,82 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import metrics
+from config import global_settings
+
+
+class ClaimsCache:
+    def __init__(self, size: int):
+        self.size = size
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Tuple[str, dict]]:
+        key = self.key(token)
+        entry = self.entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires, path, payload = entry
+
+        if expires < time.time():
+            del self.entries[key]
+
+            return None
+
+        self.entries.move_to_end(key)
+
+        return path, payload
+
+    def put(self, token: str, path: str, payload: dict, expires: float):
+        key = self.key(token)
+
+        self.entries[key] = (expires, path, payload)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
+class VerifyStats:
+    def __init__(self):
+        self.verified = 0
+        self.rejected = 0
+        self.cache_hits = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, started: float, verified: bool):
+        elapsed = time.perf_counter() - started
+
+        if verified:
+            self.verified += 1
+        else:
+            self.rejected += 1
+
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    def stats(self) -> dict:
+        count = self.verified + self.rejected
+
+        return {
+            'verified': self.verified,
+            'rejected': self.rejected,
+            'cache_hits': self.cache_hits,
+            'avg_ms': round(self.total / count * 1000, 3) if count else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+claims_cache = ClaimsCache(global_settings.auth_claims_cache_size)
+
+verify_stats = {'jwt': VerifyStats(), 'auth0': VerifyStats()}
+
+metrics.register('auth', lambda: {path: path_stats.stats() for path, path_stats in verify_stats.items()})
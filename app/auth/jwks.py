@@ -0,0 +1,94 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+import httpx
+import jwt
+
+from config import global_settings
+from log import logger
+
+
+class JWKSCache:
+    def __init__(self, url: str, ttl: float, negative_ttl: float, min_refresh_interval: float, timeout: float):
+        self.url = url
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+
+        self.keys: Dict[str, jwt.PyJWK] = {}
+        self.unknown: Dict[str, float] = {}
+        self.fetched_at = None
+        self.attempted_at = None
+        self.fetches = 0
+
+        self.lock = asyncio.Lock()
+        self.refresh_task = None
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at if self.fetched_at is not None else float('inf')
+
+    async def get_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        if kid is None:
+            return None
+
+        if not self.keys:
+            await self.refresh()
+
+        elif self.age() >= self.ttl:
+            # Stale keys keep verifying tokens while the document is fetched in the background
+            self.refresh_in_background()
+
+        if kid in self.keys:
+            return self.keys[kid]
+
+        if self.unknown.get(kid, 0) > time.monotonic():
+            return None
+
+        # Keys are rotated by publishing a new kid, so an unknown one is worth one early fetch
+        await self.refresh()
+
+        if kid not in self.keys:
+            self.unknown[kid] = time.monotonic() + self.negative_ttl
+
+        return self.keys.get(kid)
+
+    def refresh_in_background(self):
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = asyncio.create_task(self.refresh())
+
+    async def refresh(self):
+        async with self.lock:
+            # Whoever waited on the lock reuses the previous holder's attempt, failed ones included
+            if self.attempted_at is not None and time.monotonic() - self.attempted_at < self.min_refresh_interval:
+                return
+
+            self.attempted_at = time.monotonic()
+
+            try:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.get(self.url)
+                    response.raise_for_status()
+
+                key_set = jwt.PyJWKSet.from_dict(response.json())
+
+            except (httpx.HTTPError, ValueError, jwt.exceptions.PyJWKSetError) as err:
+                logger.warning(f"JWKS refresh from {self.url} failed: {err}")
+                return
+
+            finally:
+                self.fetches += 1
+
+            self.keys = {key.key_id: key for key in key_set.keys if key.key_id}
+            self.unknown = {}
+            self.fetched_at = time.monotonic()
+
+
+jwks_cache = JWKSCache(
+    f'https://{global_settings.auth0_domain}/.well-known/jwks.json',
+    ttl=global_settings.auth0_jwks_ttl,
+    negative_ttl=global_settings.auth0_jwks_negative_ttl,
+    min_refresh_interval=global_settings.auth0_jwks_min_refresh_interval,
+    timeout=global_settings.auth0_jwks_timeout
+)
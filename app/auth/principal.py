@@ -0,0 +1,125 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+import orjson
+from sqlalchemy import DateTime
+from sqlalchemy.orm import make_transient_to_detached
+
+import metrics
+from config import global_settings
+from db.redis import RedisUnavailable, redis_client
+from log import logger
+from user.models.models import UserModel
+
+# Secrets are never cached, a principal only identifies the caller
+SECRET_COLUMNS = {'hashed_password'}
+
+PRINCIPAL_COLUMNS = [column for column in UserModel.__table__.columns if column.key not in SECRET_COLUMNS]
+
+
+def principal_key(email: str) -> str:
+    return f"principal:{email}"
+
+
+def dump_principal(user: UserModel) -> dict:
+    return {column.key: getattr(user, column.key) for column in PRINCIPAL_COLUMNS}
+
+
+def load_principal(values: dict) -> UserModel:
+    values = {
+        column.key: datetime.fromisoformat(values[column.key])
+        if isinstance(column.type, DateTime) and isinstance(values[column.key], str) else values[column.key]
+        for column in PRINCIPAL_COLUMNS
+    }
+
+    # Detached rather than transient, so it is never mistaken for a new row
+    user = UserModel(**values, **dict.fromkeys(SECRET_COLUMNS))
+    make_transient_to_detached(user)
+
+    return user
+
+
+class PrincipalCache:
+    def __init__(self, local_ttl: float, local_size: int, redis_ttl: int):
+        self.local_ttl = local_ttl
+        self.local_size = local_size
+        self.redis_ttl = redis_ttl
+
+        self.local = OrderedDict()
+        self.hits = {'local': 0, 'redis': 0}
+        self.misses = 0
+
+    async def get(self, email: str) -> Optional[UserModel]:
+        entry = self.local.get(email)
+
+        if entry and entry[0] > time.monotonic():
+            self.local.move_to_end(email)
+            self.hits['local'] += 1
+
+            return load_principal(entry[1])
+
+        try:
+            async with redis_client() as redis:
+                raw = await redis.get(principal_key(email))
+
+        except RedisUnavailable:
+            raw = None
+
+        if raw is None:
+            self.misses += 1
+
+            return None
+
+        self.hits['redis'] += 1
+
+        values = orjson.loads(raw)
+        self.put_local(email, values)
+
+        return load_principal(values)
+
+    async def put(self, user: UserModel) -> UserModel:
+        values = dump_principal(user)
+
+        self.put_local(user.email, values)
+
+        try:
+            async with redis_client() as redis:
+                await redis.setex(principal_key(user.email), self.redis_ttl, orjson.dumps(values))
+
+        except RedisUnavailable:
+            pass
+
+        # The same detached principal as a cache hit, so callers never see the secrets
+        return load_principal(values)
+
+    def put_local(self, email: str, values: dict):
+        self.local[email] = (time.monotonic() + self.local_ttl, values)
+        self.local.move_to_end(email)
+
+        while len(self.local) > self.local_size:
+            self.local.popitem(last=False)
+
+    async def invalidate(self, email: str):
+        # Other workers can keep their local copy for up to local_ttl
+        self.local.pop(email, None)
+
+        try:
+            async with redis_client() as redis:
+                await redis.delete(principal_key(email))
+
+        except RedisUnavailable:
+            logger.warning(f"Principal {email} was not invalidated in redis, redis is unavailable")
+
+    def stats(self) -> dict:
+        return {'size': len(self.local), 'hits': self.hits, 'misses': self.misses}
+
+
+principal_cache = PrincipalCache(
+    local_ttl=global_settings.principal_local_ttl,
+    local_size=global_settings.principal_local_size,
+    redis_ttl=global_settings.principal_redis_ttl
+)
+
+metrics.register('principal_cache', principal_cache.stats)
@@ -14,7 +14,7 @@ router = APIRouter(prefix='/auth')
 async def login(request: LoginSchema, db: AsyncSession = Depends(get_async_session)):
     user = await UserModel.get_by_fields(db, email=request.email)
 
-    if not user or user.user_verification(request.password) == False:
+    if not user or not await user.user_verification(request.password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Incorrect login or password')
 
     return jwt_bearer.sign_jwt(user.email)
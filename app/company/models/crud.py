@@ -1,6 +1,7 @@
 from typing import Optional
 
 from fastapi import HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -18,6 +19,18 @@ class CompanyCrud:
 
         await new_role.create(db)
 
+    async def users_page(self, db: AsyncSession, cursor: Optional[str], limit: int, order_by: str):
+        from company.models.models import RoleModel
+        from user.models.models import UserModel
+
+        # Paged by membership, the cursor points at the role row
+        roles, next_cursor = await RoleModel.get_page(db, cursor, limit, order_by, id_company=self.id)
+
+        users = await db.scalars(select(UserModel).where(UserModel.id.in_([role.id_user for role in roles])))
+        users = {user.id: user for user in users}
+
+        return [users[role.id_user] for role in roles], next_cursor
+
     def user_can_edit(self, current_user_id: int) -> bool:
         return self.get_owner_id() == current_user_id
 
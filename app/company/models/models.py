@@ -1,10 +1,11 @@
 import enum
 
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 
 from company.models.crud import CompanyCrud
 from db.models import BaseModel
+from db.pagination import page_indexes
 
 
 class RoleEnum(enum.Enum):
@@ -26,6 +27,12 @@ class RoleModel(BaseModel):
     id_user = Column(Integer, ForeignKey("user.id"), nullable=False)
     role = Column(Enum(RoleEnum), nullable=False)
 
+    __table_args__ = (
+        Index('ix_role_id_company_id_user', 'id_company', 'id_user'),
+        *page_indexes('role', 'id_company'),
+        *page_indexes('role', 'id_user'),
+    )
+
 
 class CompanyModel(BaseModel, CompanyCrud):
     __tablename__ = "company"
@@ -34,11 +41,20 @@ class CompanyModel(BaseModel, CompanyCrud):
     description = Column(String, nullable=False)
     is_hidden = Column(Boolean, default=False, nullable=False)
 
-    users = relationship("UserModel", secondary="role", lazy="subquery")
-    roles = relationship("RoleModel", lazy="subquery", cascade="all, delete-orphan", overlaps="users")
-    invitations = relationship("InvitationModel", lazy="subquery", cascade="all, delete-orphan")
-    requests = relationship("RequestModel", lazy="subquery", cascade="all, delete-orphan")
-    quizzes = relationship("QuizModel", cascade="all, delete-orphan", back_populates="company", lazy="subquery")
+    users = relationship("UserModel", secondary="role", lazy="raise")
+    roles = relationship("RoleModel", lazy="raise", cascade="all, delete-orphan", overlaps="users")
+    invitations = relationship("InvitationModel", lazy="raise", cascade="all, delete-orphan")
+    requests = relationship("RequestModel", lazy="raise", cascade="all, delete-orphan")
+    quizzes = relationship("QuizModel", cascade="all, delete-orphan", back_populates="company", lazy="raise")
+
+    __table_args__ = page_indexes('company', 'is_hidden')
+
+    loading_profiles = {
+        'roles-only': ('roles',),
+        'members': ('roles', 'users'),
+        'invites': ('roles', 'users', 'invitations', 'requests'),
+        'quizzes': ('quizzes',),
+    }
 
 
 class InvitationModel(BaseModel):
@@ -47,9 +63,13 @@ class InvitationModel(BaseModel):
     id_company = Column(Integer, ForeignKey("company.id"), nullable=False)
     id_user = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
 
+    __table_args__ = (*page_indexes('invitation', 'id_company'), *page_indexes('invitation', 'id_user'))
+
 
 class RequestModel(BaseModel):
     __tablename__ = "request"
 
     id_company = Column(Integer, ForeignKey("company.id"), nullable=False)
     id_user = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+
+    __table_args__ = (*page_indexes('request', 'id_company'), *page_indexes('request', 'id_user'))
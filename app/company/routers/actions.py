@@ -1,14 +1,16 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import StreamingResponse
 
 from auth.auth import jwt_bearer
 from company.schemas import InvitationSchema, RequestSchema, RoleSchema
-from db.database import get_async_session
+from db.database import get_async_session, get_primary_session
+from db.pagination import NEXT_CURSOR_HEADER, OrderKey, PageLimit, PageSkip
 from company.models.models import CompanyModel, InvitationModel, RequestModel, RoleModel, RoleEnum, FileNameEnum
-from db.redis_actions import get_values_by_keys
+from quiz.models.models import QuizModel, ResultTestModel
 from quiz.schemas import QuizSchema, ResultData
 from user.models.models import UserModel
 from user.schemas import UserSchema
@@ -20,14 +22,14 @@ router = APIRouter(prefix='/company')
 
 @router.get("/{company_id}/owner/", response_model=UserSchema, dependencies=[Depends(jwt_bearer)])
 async def get_owner_user(company_id: int, db: AsyncSession = Depends(get_async_session)):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='members')
 
     return company.get_owner()
 
 
 @router.get("/{company_id}/admins/", response_model=List[UserSchema], dependencies=[Depends(jwt_bearer)])
 async def get_admins(company_id: int, db: AsyncSession = Depends(get_async_session)):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='members')
 
     return company.get_admins()
 
@@ -37,9 +39,9 @@ async def set_admin(
         company_id: int,
         user_id: int,
         user: UserModel = Depends(jwt_bearer),
-        db: AsyncSession = Depends(get_async_session)
+        db: AsyncSession = Depends(get_primary_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_owner(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No permission')
@@ -59,9 +61,9 @@ async def remove_admin(
         company_id: int,
         user_id: int,
         user: UserModel = Depends(jwt_bearer),
-        db: AsyncSession = Depends(get_async_session)
+        db: AsyncSession = Depends(get_primary_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_owner(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No permission')
@@ -79,17 +81,24 @@ async def remove_admin(
 @router.get("/{company_id}/users/", response_model=List[UserSchema])
 async def get_users(
         company_id: int,
-        skip: int = 0,
-        limit: int = 100,
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: PageLimit = 100,
+        order_by: OrderKey = 'id',
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_fields(db, skip=skip, limit=limit, id=company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_owner(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
 
-    return company.users
+    users, next_cursor = await company.users_page(db, cursor, limit, order_by)
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return users
 
 
 @router.get("/{company_id}/kick/{user_id}/")
@@ -97,9 +106,9 @@ async def kick_user(
         company_id: int,
         user_id: int,
         user: UserModel = Depends(jwt_bearer),
-        db: AsyncSession = Depends(get_async_session)
+        db: AsyncSession = Depends(get_primary_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
     kick_user = await UserModel.get_by_id(db, user_id)
     kick_role = await RoleModel.get_by_fields(db, id_user=kick_user.id, id_company=company.id)
 
@@ -118,15 +127,24 @@ async def kick_user(
 @router.get("/{company_id}/invitations/", response_model=List[InvitationSchema])
 async def get_invitations(
         company_id: int,
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: PageLimit = 100,
+        order_by: OrderKey = 'id',
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_owner(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
 
-    return company.invitations
+    invitations, next_cursor = await InvitationModel.get_page(db, cursor, limit, order_by, id_company=company.id)
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return invitations
 
 
 @router.post("/{company_id}/invitation/", response_model=InvitationSchema, status_code=status.HTTP_201_CREATED)
@@ -136,7 +154,7 @@ async def create_invitation(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='invites')
     new_member = await UserModel.get_by_id(db, user_id)
 
     if not company.is_owner(user.id):
@@ -156,7 +174,7 @@ async def delete_invitation(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_owner(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No create permission')
@@ -169,15 +187,24 @@ async def delete_invitation(
 @router.get("/{company_id}/requests/", response_model=List[RequestSchema])
 async def get_requests(
         company_id: int,
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: PageLimit = 100,
+        order_by: OrderKey = 'id',
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_owner(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
 
-    return company.requests
+    requests, next_cursor = await RequestModel.get_page(db, cursor, limit, order_by, id_company=company.id)
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return requests
 
 
 @router.get("/{company_id}/request/{request_id}/accept/", response_model=RoleSchema)
@@ -185,9 +212,9 @@ async def accept_request(
         company_id: int,
         request_id: int,
         user: UserModel = Depends(jwt_bearer),
-        db: AsyncSession = Depends(get_async_session)
+        db: AsyncSession = Depends(get_primary_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_owner(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
@@ -206,9 +233,9 @@ async def reject_request(
         company_id: int,
         request_id: int,
         user: UserModel = Depends(jwt_bearer),
-        db: AsyncSession = Depends(get_async_session)
+        db: AsyncSession = Depends(get_primary_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_owner(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
@@ -221,52 +248,65 @@ async def reject_request(
 @router.get("/{company_id}/quizzes/", response_model=List[QuizSchema])
 async def get_quizzes(
         company_id: int,
-        skip: int = 0,
-        limit: int = 100,
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: PageLimit = 100,
+        order_by: OrderKey = 'id',
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_user_in_company(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
 
-    return company.quizzes[skip:limit]
+    quizzes, next_cursor = await QuizModel.get_page(db, cursor, limit, order_by, id_company=company.id)
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return quizzes
 
 
 @router.get("/{company_id}/results/", response_model=List[ResultData])
 async def get_results(
         company_id: int,
-        skip: int = 0,
-        limit: int = 100,
+        skip: PageSkip = 0,
+        limit: PageLimit = 100,
+        date_from: Optional[datetime] = Query(None, alias='from'),
+        date_to: Optional[datetime] = Query(None, alias='to'),
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.user_entitled_quiz(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
 
-    results = await get_values_by_keys(id_company=company_id)
+    results = await ResultTestModel.get_results_data(
+        db, id_company=company_id, skip=skip, limit=limit, date_from=date_from, date_to=date_to
+    )
 
     if not results:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Results not found")
 
-    return results[skip:limit]
+    return results
 
 
 @router.get("/{company_id}/results/csv/")
 async def get_results_csv(
         company_id: int,
+        date_from: Optional[datetime] = Query(None, alias='from'),
+        date_to: Optional[datetime] = Query(None, alias='to'),
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.user_entitled_quiz(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
 
-    results = await get_values_by_keys(id_company=company_id)
+    results = await ResultTestModel.get_results_data(db, id_company=company_id, date_from=date_from, date_to=date_to)
 
     if not results:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Results not found")
@@ -281,37 +321,45 @@ async def get_results_csv(
 async def get_user_results(
         company_id: int,
         user_id: int,
-        skip: int = 0,
-        limit: int = 100,
+        skip: PageSkip = 0,
+        limit: PageLimit = 100,
+        date_from: Optional[datetime] = Query(None, alias='from'),
+        date_to: Optional[datetime] = Query(None, alias='to'),
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_user_in_company(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
 
-    results = await get_values_by_keys(id_user=user_id, id_company=company_id)
+    results = await ResultTestModel.get_results_data(
+        db, id_user=user_id, id_company=company_id, skip=skip, limit=limit, date_from=date_from, date_to=date_to
+    )
 
     if not results:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Results not found")
 
-    return results[skip:limit]
+    return results
 
 
 @router.get("/{company_id}/results_user/{user_id}/csv/")
 async def get_user_results_csv(
         company_id: int,
         user_id: int,
+        date_from: Optional[datetime] = Query(None, alias='from'),
+        date_to: Optional[datetime] = Query(None, alias='to'),
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_user_in_company(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
 
-    results = await get_values_by_keys(id_user=user_id, id_company=company_id)
+    results = await ResultTestModel.get_results_data(
+        db, id_user=user_id, id_company=company_id, date_from=date_from, date_to=date_to
+    )
 
     if not results:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Results not found")
@@ -326,37 +374,45 @@ async def get_user_results_csv(
 async def get_results_quiz(
         company_id: int,
         quiz_id: int,
-        skip: int = 0,
-        limit: int = 100,
+        skip: PageSkip = 0,
+        limit: PageLimit = 100,
+        date_from: Optional[datetime] = Query(None, alias='from'),
+        date_to: Optional[datetime] = Query(None, alias='to'),
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_user_in_company(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
 
-    results = await get_values_by_keys(id_company=company_id, id_quiz=quiz_id)
+    results = await ResultTestModel.get_results_data(
+        db, id_company=company_id, id_quiz=quiz_id, skip=skip, limit=limit, date_from=date_from, date_to=date_to
+    )
 
     if not results:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Results not found")
 
-    return results[skip:limit]
+    return results
 
 
 @router.get("/{company_id}/results_quiz/{quiz_id}/csv/")
 async def get_results_quiz_csv(
         company_id: int,
         quiz_id: int,
+        date_from: Optional[datetime] = Query(None, alias='from'),
+        date_to: Optional[datetime] = Query(None, alias='to'),
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.is_user_in_company(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No read permission')
 
-    results = await get_values_by_keys(id_company=company_id, id_quiz=quiz_id)
+    results = await ResultTestModel.get_results_data(
+        db, id_company=company_id, id_quiz=quiz_id, date_from=date_from, date_to=date_to
+    )
 
     if not results:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Results not found")
@@ -1,11 +1,12 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.auth import jwt_bearer
 from company.schemas import CompanySchema, CompanyCreateRequest, CompanyUpdateRequest
 from db.database import get_async_session
+from db.pagination import NEXT_CURSOR_HEADER, OrderKey, PageLimit
 from company.models.models import CompanyModel
 from user.models.models import UserModel
 
@@ -13,12 +14,21 @@ router = APIRouter(prefix='/company')
 
 
 @router.get("/", response_model=List[CompanySchema], dependencies=[Depends(jwt_bearer)])
-async def get_companies(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_session)):
-    companies = await CompanyModel.get_by_fields(db, return_single=False, skip=skip, limit=limit, is_hidden=False)
+async def get_companies(
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: PageLimit = 100,
+        order_by: OrderKey = 'id',
+        db: AsyncSession = Depends(get_async_session)
+):
+    companies, next_cursor = await CompanyModel.get_page(db, cursor, limit, order_by, is_hidden=False)
 
     if not companies:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No records found')
 
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
     return companies
 
 
@@ -52,7 +62,7 @@ async def update_company(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.user_can_edit(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='This user cannot change the company')
@@ -68,7 +78,7 @@ async def delete_company(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='roles-only')
 
     if not company.user_can_delete(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='This user cannot delete сompany')
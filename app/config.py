@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import find_dotenv
 
@@ -18,9 +20,30 @@ class Settings(BaseSettings):
     db_password_test: str
     db_database_test: str
 
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+
+    db_sync_pool_size: int = 2
+    db_sync_max_overflow: int = 2
+    db_sync_yield_per: int = 1000
+
+    db_replica_hosts: str = ''
+    db_read_your_writes_ttl: int = 5
+
     redis_host: str
     redis_port: int
     redis_db: int
+    redis_db_test: int = 1
+
+    redis_max_connections: int = 20
+    redis_pool_timeout: float = 1
+    redis_socket_timeout: float = 0.5
+    redis_breaker_threshold: int = 5
+    redis_breaker_reset: float = 30
 
     jwt_secret: str
     jwt_algorithm: str
@@ -29,6 +52,21 @@ class Settings(BaseSettings):
     auth0_api_audience: str
     auth0_issuer: str
     auth0_algorithms: str
+    auth0_jwks_ttl: float = 600
+    auth0_jwks_negative_ttl: float = 60
+    auth0_jwks_min_refresh_interval: float = 10
+    auth0_jwks_timeout: float = 5
+
+    principal_local_ttl: float = 5
+    principal_local_size: int = 1024
+    principal_redis_ttl: int = 60
+
+    auth_claims_cache_size: int = 4096
+
+    analytic_cache_ttl: int = 600
+
+    hash_workers: int = 2
+    hash_max_queue: int = 32
 
     smtp_host: str
     smtp_port: str
@@ -47,6 +85,11 @@ class Settings(BaseSettings):
         return f"postgresql://{self.db_username}:{self.db_password}@{self.db_host}:" \
                f"{self.db_port}/{self.db_database}"
 
+    @property
+    def postgresql_replica_urls(self) -> List[str]:
+        return [f"postgresql+asyncpg://{self.db_username}:{self.db_password}@{host.strip()}:"
+                f"{self.db_port}/{self.db_database}" for host in self.db_replica_hosts.split(',') if host.strip()]
+
     @property
     def postgresql_test_url(self) -> str:
         return f"postgresql+asyncpg://{self.db_username_test}:{self.db_password_test}@{self.db_host_test}:" \
@@ -1,12 +1,14 @@
-from typing import Type, List, TypeVar, Dict
+from typing import Type, List, TypeVar, Dict, Optional, Tuple, Sequence
 import re
 
 from fastapi import status, HTTPException
-from sqlalchemy import and_, select
+from sqlalchemy import and_, select, tuple_, insert, Select, Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 
 from db.database import Base
+from db.pagination import ORDER_KEYS, encode_cursor, decode_cursor
 
 TBase = TypeVar("TBase", bound="BaseModel")
 
@@ -14,17 +16,36 @@ TBase = TypeVar("TBase", bound="BaseModel")
 class BaseCRUD(Base):
     __abstract__ = True
 
+    # Relationships are declared with lazy="raise", so every query has to name the graph it needs.
+    # A profile maps a name to dotted relationship paths that are loaded with selectinload,
+    # the implicit "bare" profile loads no relationships at all.
+    loading_profiles: Dict[str, Tuple[str, ...]] = {}
+
     @classmethod
-    async def get_all(cls: Type[TBase], db: AsyncSession, skip: int = 0, limit: int = 100) -> List[TBase]:
-        query = select(cls).offset(skip).limit(limit).order_by(cls.id)
-        result = await db.execute(query)
-        instances = result.scalars().all()
+    def loading_options(cls, profile: str = 'bare') -> list:
+        if profile == 'bare':
+            return []
+
+        if profile not in cls.loading_profiles:
+            raise ValueError(f"Unknown loading profile {profile} for {cls.__tablename__}")
+
+        options = []
+
+        for path in cls.loading_profiles[profile]:
+            model, option = cls, None
+
+            for name in path.split('.'):
+                attribute = getattr(model, name)
+                option = selectinload(attribute) if option is None else option.selectinload(attribute)
+                model = attribute.property.mapper.class_
+
+            options.append(option)
 
-        return instances
+        return options
 
     @classmethod
-    async def get_by_id(cls: Type[TBase], db: AsyncSession, obj_id: int) -> TBase:
-        query = select(cls).where(cls.id == obj_id)
+    async def get_by_id(cls: Type[TBase], db: AsyncSession, obj_id: int, profile: str = 'bare') -> TBase:
+        query = select(cls).where(cls.id == obj_id).options(*cls.loading_options(profile))
         result = await db.execute(query)
         instance = result.scalars().first()
 
@@ -34,6 +55,12 @@ class BaseCRUD(Base):
 
         return instance
 
+    @classmethod
+    def fields_query(cls: Type[TBase], skip: int = None, limit: int = None, **kwargs) -> Select:
+        filters = [getattr(cls, field) == value for field, value in kwargs.items()]
+
+        return select(cls).where(and_(*filters)).offset(skip).limit(limit).order_by(cls.id)
+
     @classmethod
     async def get_by_fields(
             cls: Type[TBase],
@@ -41,10 +68,10 @@ class BaseCRUD(Base):
             return_single: bool = True,
             skip: int = None,
             limit: int = None,
+            profile: str = 'bare',
             **kwargs
     ) -> List[TBase]:
-        filters = [getattr(cls, field) == value for field, value in kwargs.items()]
-        query = select(cls).where(and_(*filters)).offset(skip).limit(limit).order_by(cls.id)
+        query = cls.fields_query(skip, limit, **kwargs).options(*cls.loading_options(profile))
         result = await db.execute(query)
         instances = result.scalars().all()
 
@@ -53,27 +80,105 @@ class BaseCRUD(Base):
 
         return instances[0] if return_single else instances
 
-    async def create(self, db: AsyncSession) -> TBase:
+    @classmethod
+    def columns_query(cls: Type[TBase], columns: Sequence[str], skip: int = None, limit: int = None, **kwargs) -> Select:
+        filters = [getattr(cls, field) == value for field, value in kwargs.items()]
+        columns = [getattr(cls, column) for column in columns]
+
+        return select(*columns).where(*filters).offset(skip).limit(limit).order_by(cls.id)
+
+    @classmethod
+    async def get_columns(
+            cls: Type[TBase],
+            db: AsyncSession,
+            columns: Sequence[str],
+            skip: int = None,
+            limit: int = None,
+            **kwargs
+    ) -> List[Row]:
+        # Projection of get_by_fields: only the named columns are selected and the rows come back
+        # as named tuples, no instances are put into the identity map
+        result = await db.execute(cls.columns_query(columns, skip, limit, **kwargs))
+
+        return result.all()
+
+    @classmethod
+    def page_query(cls: Type[TBase], cursor: Optional[str], limit: int, order_by: str = 'id', **kwargs) -> Select:
+        # One extra row tells whether there is a next page
+        order_columns = [getattr(cls, key) for key in ORDER_KEYS[order_by]]
+
+        filters = [getattr(cls, field) == value for field, value in kwargs.items()]
+
+        if cursor:
+            filters.append(tuple_(*order_columns) > tuple_(*decode_cursor(order_by, cursor)))
+
+        return select(cls).where(*filters).order_by(*order_columns).limit(limit + 1)
+
+    @classmethod
+    async def get_page(
+            cls: Type[TBase],
+            db: AsyncSession,
+            cursor: Optional[str] = None,
+            limit: int = 100,
+            order_by: str = 'id',
+            **kwargs
+    ) -> Tuple[List[TBase], Optional[str]]:
+        # Keyset pagination: the cursor holds the sort key of the last row of the previous page,
+        # so every page is an index range scan regardless of how deep it is.
+        if limit < 1:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Limit must be positive')
+
+        query = cls.page_query(cursor, limit, order_by, **kwargs)
+        result = await db.execute(query)
+        instances = result.scalars().all()
+
+        if len(instances) <= limit:
+            return instances, None
+
+        instances = instances[:limit]
+        next_cursor = encode_cursor(order_by, [getattr(instances[-1], key) for key in ORDER_KEYS[order_by]])
+
+        return instances, next_cursor
+
+    async def load_profile(self, db: AsyncSession, profile: str) -> TBase:
+        # Re-reads the instance with populate_existing so collections changed in this session are fresh
+        query = select(type(self)).where(type(self).id == self.id).options(*self.loading_options(profile))
+        await db.execute(query.execution_options(populate_existing=True))
+
+        return self
+
+    @classmethod
+    async def bulk_insert(cls: Type[TBase], db: AsyncSession, rows: List[Dict]) -> List[int]:
+        # One multi-row INSERT ... RETURNING id per batch, ids come back in the order of rows.
+        # Nothing is committed here, the caller owns the transaction.
+        if not rows:
+            return []
+
+        query = insert(cls).returning(cls.id, sort_by_parameter_order=True)
+        result = await db.execute(query, rows)
+
+        return result.scalars().all()
+
+    @staticmethod
+    async def commit(db: AsyncSession):
         try:
-            db.add(self)
             await db.commit()
-            await db.refresh(self)
 
         except IntegrityError as e:
             detail = re.search(r'DETAIL: (.*)', e.orig.args[0])[1]
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
 
+    async def create(self, db: AsyncSession) -> TBase:
+        db.add(self)
+        await self.commit(db)
+        await db.refresh(self)
+
     async def update(self, db: AsyncSession, data) -> TBase:
         for key, value in dict(data).items():
             setattr(self, key, value)
 
-        try:
-            await db.commit()
-            await db.refresh(self)
-
-        except IntegrityError as e:
-            detail = re.search(r'DETAIL: (.*)', e.orig.args[0])[1]
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+        await self.commit(db)
+        await db.refresh(self)
 
     async def delete(self, db: AsyncSession) -> Dict:
         await db.delete(self)
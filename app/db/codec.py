@@ -0,0 +1,54 @@
+import json
+import zlib
+
+import orjson
+
+# Payloads start with a format byte, entries cached before the header existed are plain JSON objects
+COMPACT = b'\x01'
+COMPACT_ZLIB = b'\x02'
+
+COMPRESS_MIN_SIZE = 1024
+
+RESULT_FIELDS = ('id', 'id_user', 'id_company', 'id_quiz', 'created_at')
+QUESTION_FIELDS = ('question', 'answer_is_correct', 'user_answers')
+
+
+def pack_result(result: dict) -> list:
+    # Positional arrays instead of objects, so field names aren't stored for every question
+    return [
+        *(result[field] for field in RESULT_FIELDS),
+        [[question[field] for field in QUESTION_FIELDS] for question in result['questions']]
+    ]
+
+
+def unpack_result(packed: list) -> dict:
+    *values, questions = packed
+
+    return {
+        **dict(zip(RESULT_FIELDS, values)),
+        'questions': [dict(zip(QUESTION_FIELDS, question)) for question in questions]
+    }
+
+
+def encode_result(result: dict) -> bytes:
+    body = orjson.dumps(pack_result(result))
+
+    if len(body) >= COMPRESS_MIN_SIZE:
+        compressed = zlib.compress(body)
+
+        if len(compressed) < len(body):
+            return COMPACT_ZLIB + compressed
+
+    return COMPACT + body
+
+
+def decode_result(payload: bytes) -> dict:
+    header, body = payload[:1], payload[1:]
+
+    if header == COMPACT:
+        return unpack_result(orjson.loads(body))
+
+    if header == COMPACT_ZLIB:
+        return unpack_result(orjson.loads(zlib.decompress(body)))
+
+    return json.loads(payload)
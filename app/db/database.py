@@ -1,17 +1,145 @@
-from sqlalchemy import MetaData, create_engine
+import hashlib
+import random
+
+from fastapi import Depends, Request
+from sqlalchemy import MetaData, Select, create_engine, event
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 
+import metrics
 from config import global_settings
+from db.pool import MeteredQueuePool
+from db.redis import RedisUnavailable, redis_client
+from log import logger
+
+
+def make_engine(url: str):
+    return create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        poolclass=MeteredQueuePool,
+        pool_size=global_settings.db_pool_size,
+        max_overflow=global_settings.db_max_overflow,
+        pool_timeout=global_settings.db_pool_timeout,
+        pool_recycle=global_settings.db_pool_recycle,
+        pool_pre_ping=global_settings.db_pool_pre_ping,
+        connect_args={'prepared_statement_cache_size': global_settings.db_statement_cache_size}
+    )
+
+
+engine = make_engine(global_settings.postgresql_url)
+
+replica_engines = [make_engine(url) for url in global_settings.postgresql_replica_urls]
+
+metrics.register('database', lambda: engine.sync_engine.pool.stats())
+
+if replica_engines:
+    metrics.register('database_replicas', lambda: [replica.sync_engine.pool.stats() for replica in replica_engines])
+
+PRIMARY = 'primary'
+WROTE = 'wrote'
+CALLER = 'caller'
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        # Plain selects go to a replica until the session writes, then it reads its own writes from the primary
+        is_read = isinstance(clause, Select) and clause._for_update_arg is None
+
+        if not is_read or self._flushing:
+            self.info[PRIMARY] = True
+
+        elif replica_engines and not self.info.get(PRIMARY):
+            return random.choice(replica_engines).sync_engine
+
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def mark_flush(session, flush_context):
+    session.info[WROTE] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def mark_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[WROTE] = True
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def unmark_rollback(session):
+    session.info.pop(WROTE, None)
+
+
+def recent_write_key(token: str) -> str:
+    return f"recent_write:{hashlib.sha256(token.encode()).hexdigest()}"
 
-engine = create_async_engine(
-    global_settings.postgresql_url,
+
+class RoutingAsyncSession(AsyncSession):
+    async def commit(self):
+        await super().commit()
+
+        # A committed write keeps the caller's reads on the primary until the replicas have caught up
+        if self.info.pop(WROTE, False) and self.info.get(CALLER) and replica_engines:
+            try:
+                async with redis_client() as redis:
+                    key = recent_write_key(self.info[CALLER])
+                    await redis.setex(key, global_settings.db_read_your_writes_ttl, 1)
+
+            except RedisUnavailable:
+                logger.warning("Recent write was not marked, redis is unavailable")
+
+
+def use_primary(db):
+    db.info[PRIMARY] = True
+
+    return db
+
+
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+async def route_session(db, request: Request):
+    # Write routes run on the primary from their first statement, reads before the write included,
+    # reads of a caller who has just committed a write go there as well
+    token = request.headers.get('Authorization')
+
+    if token:
+        db.info[CALLER] = token
+
+    if request.method not in READ_METHODS:
+        use_primary(db)
+
+    elif token and replica_engines:
+        try:
+            async with redis_client() as redis:
+                wrote = await redis.exists(recent_write_key(token))
+
+        except RedisUnavailable:
+            wrote = True
+
+        if wrote:
+            use_primary(db)
+
+    return db
+
+
+async_session = sessionmaker(engine, class_=RoutingAsyncSession, sync_session_class=RoutingSession,
+                             expire_on_commit=False, future=True)
+
+# Shared by Celery and APScheduler jobs; celery workers reset the pool after fork (see tasks.celery_tasks)
+engine_sync = create_engine(
+    global_settings.postgresql_sync_url,
     echo=False,
-    future=True
+    pool_size=global_settings.db_sync_pool_size,
+    max_overflow=global_settings.db_sync_max_overflow,
+    pool_recycle=global_settings.db_pool_recycle,
+    pool_pre_ping=global_settings.db_pool_pre_ping
 )
 
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, future=True)
+sync_session = sessionmaker(bind=engine_sync, expire_on_commit=False)
 
 metadata = MetaData()
 
@@ -20,13 +148,20 @@ class Base(DeclarativeBase):
     metadata = metadata
 
 
-async def get_async_session() -> AsyncSession:
+async def get_async_session(request: Request) -> AsyncSession:
     async with async_session() as session:
-        yield session
+        yield await route_session(session, request)
+
+
+async def get_primary_session(db: AsyncSession = Depends(get_async_session)) -> AsyncSession:
+    # For routes that change state over GET, their checks and writes must not see a lagging replica
+    return use_primary(db)
 
 
 def get_sync_session():
-    engine_sync = create_engine(global_settings.postgresql_sync_url, echo=False)
-    session_sync = sessionmaker(bind=engine_sync)
+    return sync_session()
+
 
-    return session_sync()
+def stream(query):
+    # Server-side cursor, rows are fetched db_sync_yield_per at a time instead of all at once
+    return query.execution_options(yield_per=global_settings.db_sync_yield_per)
@@ -0,0 +1,57 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Annotated, List, Literal
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Index
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+OrderKey = Literal['id', 'created_at']
+
+MAX_PAGE_SIZE = 1000
+
+
+def page_indexes(table: str, *columns: str) -> tuple:
+    # One index per order key behind the equality filter columns of a get_page call,
+    # so a page at any depth is a range scan of the index with no sort
+    return tuple(
+        Index(f"ix_{table}_{'_'.join(columns + keys)}", *columns, *keys)
+        for keys in ORDER_KEYS.values()
+    )
+
+
+PageLimit = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
+PageSkip = Annotated[int, Query(ge=0)]
+
+ORDER_KEYS = {
+    'id': ('id',),
+    'created_at': ('created_at', 'id'),
+}
+
+
+def encode_cursor(order_by: str, values: list) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+
+    raw = json.dumps([order_by, values], separators=(',', ':')).encode()
+
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(order_by: str, cursor: str) -> List:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_order_by, values = json.loads(raw)
+
+        if cursor_order_by != order_by or len(values) != len(ORDER_KEYS[order_by]):
+            raise ValueError
+
+        return [
+            datetime.fromisoformat(value) if key == 'created_at' else int(value)
+            for key, value in zip(ORDER_KEYS[order_by], values)
+        ]
+
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
@@ -1,8 +1,133 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
 import redis.asyncio as redis
+from redis.exceptions import RedisError
 
+import metrics
 from config import global_settings
 
 
+class RedisUnavailable(Exception):
+    pass
+
+
+class MeteredConnectionPool(redis.BlockingConnectionPool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.in_use = set()
+        self.checkouts = 0
+        self.errors = 0
+
+    async def get_connection(self, *args, **kwargs):
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+
+        except redis.ConnectionError:
+            self.errors += 1
+            raise
+
+        self.checkouts += 1
+        self.in_use.add(connection)
+
+        return connection
+
+    async def release(self, connection):
+        self.in_use.discard(connection)
+
+        await super().release(connection)
+
+    def stats(self) -> dict:
+        return {
+            'max_connections': self.max_connections,
+            'created': len(self._connections),
+            'in_use': len(self.in_use),
+            'checkouts': self.checkouts,
+            'errors': self.errors,
+        }
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self) -> bool:
+        # Once reset_timeout has passed requests are let through again, the next failure reopens it
+        return self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        self.failures += 1
+
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {'open': self.is_open, 'failures': self.failures}
+
+
+client: Optional[redis.Redis] = None
+
+breaker = CircuitBreaker(global_settings.redis_breaker_threshold, global_settings.redis_breaker_reset)
+
+
 async def init_redis_pool() -> redis.Redis:
-    redis_c = await redis.from_url(global_settings.redis_url)
-    return redis_c
+    global client
+
+    if client is None:
+        pool = MeteredConnectionPool.from_url(
+            global_settings.redis_url,
+            max_connections=global_settings.redis_max_connections,
+            timeout=global_settings.redis_pool_timeout,
+            socket_timeout=global_settings.redis_socket_timeout,
+            socket_connect_timeout=global_settings.redis_socket_timeout
+        )
+
+        client = redis.Redis(connection_pool=pool)
+
+    return client
+
+
+async def close_redis_pool():
+    global client
+
+    if client is not None:
+        await client.close(close_connection_pool=True)
+
+        client = None
+
+
+@asynccontextmanager
+async def redis_client():
+    if breaker.is_open:
+        raise RedisUnavailable
+
+    try:
+        yield await init_redis_pool()
+
+    except (RedisError, OSError, asyncio.TimeoutError) as e:
+        breaker.failure()
+        raise RedisUnavailable from e
+
+    breaker.success()
+
+
+def redis_stats() -> dict:
+    return {
+        'pool': client.connection_pool.stats() if client is not None else None,
+        'breaker': breaker.stats(),
+    }
+
+
+metrics.register('redis', redis_stats)
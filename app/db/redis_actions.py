@@ -1,32 +1,141 @@
-import json
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+from typing import Dict, List, Optional, Union
 
-from db.redis import init_redis_pool
+from db.codec import encode_result, decode_result
+from db.redis import redis_client
+
+RESULT_TTL = timedelta(hours=48)
+INDEX_TTL = timedelta(days=7)
+
+INDEXED_FIELDS = ('id_user', 'id_company', 'id_quiz')
+
+# Member that marks an index as complete, its -inf score keeps it out of every range query
+INDEX_BUILT = 0
+
+# Redis orders equal scores by member bytes, fixed width ids make that the numeric order,
+# so results created at the same time come back id desc like in Postgres
+MEMBER_WIDTH = 19
+
+
+def result_key(result_id) -> str:
+    return f"result_test:{result_id}"
+
+
+def index_key(**kwargs) -> str:
+    # One sorted set per combination of fields, so every filter is a single range read
+    return 'result_index:v2:' + ':'.join(f"{field}:{kwargs[field]}" for field in INDEXED_FIELDS if field in kwargs)
+
+
+def index_keys(**fields) -> List[str]:
+    # Every index a result with these fields belongs to
+    return [
+        index_key(**{field: fields[field] for field in combination})
+        for size in range(1, len(INDEXED_FIELDS) + 1)
+        for combination in combinations(INDEXED_FIELDS, size)
+    ]
+
+
+def index_member(result_id: int) -> str:
+    return f"{result_id:0{MEMBER_WIDTH}d}"
+
+
+def as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=value.tzinfo or timezone.utc)
+
+
+def result_score(created_at: Union[datetime, str]) -> float:
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+
+    return as_utc(created_at).timestamp()
 
 
 async def add_test_result_to_redis(result_id: int, user_id: int, id_company: int, id_quiz: int, data: dict):
-    redis = await init_redis_pool()
+    score = result_score(data['created_at'])
+
+    async with redis_client() as redis, redis.pipeline(transaction=True) as pipe:
+        pipe.setex(result_key(result_id), RESULT_TTL, encode_result(data))
+
+        # Added even when the index isn't built yet, so a concurrent rebuild can't miss the result
+        for key in index_keys(id_user=user_id, id_company=id_company, id_quiz=id_quiz):
+            pipe.zadd(key, {index_member(result_id): score})
+            pipe.expire(key, INDEX_TTL)
+
+        await pipe.execute()
+
+
+async def remove_results(results: List[Dict[str, int]]):
+    # results need id, id_user, id_company and id_quiz, the payloads and every index membership are dropped
+    if not results:
+        return
+
+    async with redis_client() as redis, redis.pipeline(transaction=False) as pipe:
+        for result in results:
+            pipe.delete(result_key(result['id']))
+
+            for key in index_keys(**{field: result[field] for field in INDEXED_FIELDS}):
+                pipe.zrem(key, index_member(result['id']))
+
+        await pipe.execute()
+
+
+async def is_index_built(**kwargs) -> bool:
+    async with redis_client() as redis:
+        return await redis.zscore(index_key(**kwargs), INDEX_BUILT) is not None
+
+
+async def build_index(scores: Dict[int, float], **kwargs):
+    async with redis_client() as redis, redis.pipeline(transaction=True) as pipe:
+        members = {index_member(result_id): score for result_id, score in scores.items()}
+
+        pipe.zadd(index_key(**kwargs), {INDEX_BUILT: float('-inf'), **members})
+        pipe.expire(index_key(**kwargs), INDEX_TTL)
+
+        await pipe.execute()
+
 
-    key = f"result_test:{result_id:}:id_user:{user_id}:id_company:{id_company}:id_quiz:{id_quiz}"
+async def get_result_ids(
+        skip: int = 0,
+        limit: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        **kwargs
+) -> List[int]:
+    # Newest first, a page is a single range read whatever the date filters are
+    async with redis_client() as redis:
+        ids = await redis.zrevrangebyscore(
+            index_key(**kwargs),
+            result_score(date_to) if date_to else '+inf',
+            result_score(date_from) if date_from else '(-inf',
+            start=skip,
+            num=limit if limit is not None else -1
+        )
 
-    await redis.setex(key, timedelta(hours=48), json.dumps(data))
+    return [int(result_id) for result_id in ids]
 
 
-async def get_value_by_keys(**kwargs):
-    values = await get_values_by_keys(**kwargs)
+async def remove_from_index(ids: List[int], **kwargs):
+    async with redis_client() as redis:
+        await redis.zrem(index_key(**kwargs), *map(index_member, ids))
 
-    return None if len(values) == 0 else values[0]
 
+async def get_results(ids: List[int]) -> Dict[int, dict]:
+    if not ids:
+        return {}
 
-async def get_values_by_keys(**kwargs):
-    redis = await init_redis_pool()
+    async with redis_client() as redis:
+        values = await redis.mget([result_key(result_id) for result_id in ids])
 
-    pattern = '*' + '*'.join([f"{key}:{value}" for key, value in kwargs.items()]) + '*'
+    return {result_id: decode_result(value) for result_id, value in zip(ids, values) if value is not None}
 
-    keys = await redis.keys(pattern)
 
-    return await get_values(redis, keys)
+async def cache_results(results: List[dict]):
+    if not results:
+        return
 
+    async with redis_client() as redis, redis.pipeline(transaction=False) as pipe:
+        for result in results:
+            pipe.setex(result_key(result['id']), RESULT_TTL, encode_result(result))
 
-async def get_values(redis, keys):
-    return [json.loads(await redis.get(key)) for key in keys if await redis.get(key)]
+        await pipe.execute()
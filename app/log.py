@@ -1,5 +1,6 @@
 import os
 import logging
+import logging.config
 
 current_file = os.path.abspath(__file__)
 
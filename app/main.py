@@ -2,8 +2,11 @@ from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+import metrics
 from log import logger
 from config import global_settings
+from db.pagination import NEXT_CURSOR_HEADER
+from db.redis import init_redis_pool, close_redis_pool
 from tasks import apscheduler_tasks
 from user.routers.crud import router as user_crud_router
 from user.routers.actions import router as user_actions_router
@@ -26,6 +29,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -33,6 +37,8 @@ app.add_middleware(
 async def startup_event():
     logger.info("App startup...")
 
+    await init_redis_pool()
+
     apscheduler_tasks.scheduler.start()
 
 
@@ -40,6 +46,8 @@ async def startup_event():
 async def shutdown_event():
     logger.info("App shutdown...")
 
+    await close_redis_pool()
+
 
 @app.get("/")
 async def health_check():
@@ -50,6 +58,11 @@ async def health_check():
     }
 
 
+@app.get("/metrics/")
+async def get_metrics():
+    return metrics.collect()
+
+
 app.include_router(auth_router, tags=["Auth"])
 
 app.include_router(user_crud_router, tags=["User"])
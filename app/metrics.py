@@ -0,0 +1,13 @@
+import os
+from typing import Callable, Dict
+
+collectors: Dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, collector: Callable[[], dict]):
+    collectors[name] = collector
+
+
+def collect() -> dict:
+    # Values are per worker process, gunicorn workers report independently
+    return {'pid': os.getpid(), **{name: collector() for name, collector in collectors.items()}}
@@ -1,59 +1,85 @@
+from datetime import datetime, timezone
+
 from fastapi import status, HTTPException
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from analytic.models.crud import AverageScoreCompanyCrud, AverageScoreGlobalCrud
+from analytic.cache import analytic_cache
+from analytic.models.crud import AverageScoreCompanyCrud, AverageScoreGlobalCrud, DailyScoreRollupCrud, LastPassCrud, QuestionStatCrud
+from db import redis_actions
+from db.redis import RedisUnavailable
 from db.redis_actions import add_test_result_to_redis
-from quiz.schemas import ResultTestSchema, ResultData
+from log import logger
+from quiz.schemas import ResultTestSchema, ResultData, ResultQuestion
 
 
 class QuestionCrud:
-    async def create_with_answer(self, db: AsyncSession, data):
-        from quiz.models.models import AnswerModel
-
-        await self.create(db)
-
-        for answer in data:
-            new_answer = AnswerModel(answer=answer.answer, id_question=self.id, is_correct=answer.is_correct)
+    @staticmethod
+    async def bulk_create(db: AsyncSession, id_quiz: int, questions: list):
+        from quiz.models.models import QuestionModel, AnswerModel
 
-            await new_answer.create(db)
+        question_ids = await QuestionModel.bulk_insert(
+            db,
+            [{'question': question.question, 'id_quiz': id_quiz} for question in questions]
+        )
 
-        await db.refresh(self)
+        await AnswerModel.bulk_insert(db, [
+            {'answer': answer.answer, 'id_question': question_id, 'is_correct': answer.is_correct}
+            for question_id, question in zip(question_ids, questions)
+            for answer in question.answers
+        ])
 
     async def update_with_answers(self, db, data):
         from quiz.models.models import AnswerModel
 
-        await self.update(db, {'question': data.question})
+        changed = self.question != data.question or len(self.answers) != len(data.answers)
+
+        self.question = data.question
+
+        # Answers are matched by position, so only rows whose text or correctness changed are updated
+        # and the tail is deleted or inserted; everything is flushed in a single transaction.
+        answers = list(self.answers)
+
+        for answer, new_answer in zip(answers, data.answers):
+            if answer.answer != new_answer.answer or answer.is_correct != new_answer.is_correct:
+                answer.answer = new_answer.answer
+                answer.is_correct = new_answer.is_correct
+                changed = True
 
-        for answer in self.answers:
-            await answer.delete(db)
+        for answer in answers[len(data.answers):]:
+            self.answers.remove(answer)
 
-        for answer in data.answers:
-            new_answer = AnswerModel(answer=answer.answer, id_question=self.id, is_correct=answer.is_correct)
+        for new_answer in data.answers[len(answers):]:
+            self.answers.append(AnswerModel(answer=new_answer.answer, is_correct=new_answer.is_correct))
 
-            await new_answer.create(db)
+        # Counters gathered for the previous wording don't describe the edited question
+        if changed:
+            await QuestionStatCrud.reset(db, self.id)
 
-        await db.refresh(self)
+        await self.commit(db)
+
+        await self.load_profile(db, 'question-with-answers')
 
 
 class QuizCrud:
     async def create_with_questions(self, db: AsyncSession, data):
         from quiz.models.models import QuestionModel
 
-        await self.create(db)
+        db.add(self)
+        await db.flush()
 
-        for question in data.questions:
-            new_question = QuestionModel(question=question.question, id_quiz=self.id)
+        await QuestionModel.bulk_create(db, self.id, data.questions)
 
-            await new_question.create_with_answer(db, question.answers)
+        await self.commit(db)
 
     async def add_question(self, db: AsyncSession, data):
         from quiz.models.models import QuestionModel
 
-        new_question = QuestionModel(question=data.question, id_quiz=self.id)
+        await QuestionModel.bulk_create(db, self.id, [data])
 
-        await new_question.create_with_answer(db, data.answers)
+        await self.commit(db)
 
-        await db.refresh(self)
+        await self.load_profile(db, 'quiz-with-questions')
 
     def get_question_by_id(self, id: int):
         return next((question for question in self.questions if question.id == id), None)
@@ -107,49 +133,146 @@ class QuizCrud:
             count_questions=len(self.questions)
         )
 
-        await result_test.create_with_questions(db, self, self.add_text_to_answers(answers), checking_answers)
+        user_answers = self.add_text_to_answers(answers)
+
+        await result_test.create_with_questions(db, self, user_answers, checking_answers)
+
+        await AverageScoreCompanyCrud.add_company_result(db, result_test)
+        await AverageScoreGlobalCrud.add_global_result(db, result_test)
+        await DailyScoreRollupCrud.add_daily_result(db, result_test)
+        await LastPassCrud.add_last_pass(db, result_test)
+        await QuestionStatCrud.add_quiz_result(db, self, answers, checking_answers)
+
+        await self.commit(db)
+
+        try:
+            await add_test_result_to_redis(
+                result_test.id,
+                result_test.id_user,
+                result_test.id_company,
+                result_test.id_quiz,
+                result_test.result_data(self, user_answers, checking_answers)
+            )
+
+        except RedisUnavailable:
+            logger.warning(f"Result {result_test.id} was not cached, redis is unavailable")
 
-        await AverageScoreCompanyCrud.set_company_rating(db, test_user, self.company.id)
-        await AverageScoreGlobalCrud.set_global_rating(db, test_user)
+        await analytic_cache.bump(result_test.id_company, [result_test.id_user])
 
         return result_test
 
 
 class ResultTestCrud:
-    async def create_with_questions(self, db: AsyncSession, quiz, user_answers: list, checking_answers: list):
-        from quiz.models.models import ResultQuestionModel
+    @classmethod
+    async def get_results_data(
+            cls,
+            db: AsyncSession,
+            result_test: int = None,
+            skip: int = 0,
+            limit: int = None,
+            date_from: datetime = None,
+            date_to: datetime = None,
+            **kwargs
+    ) -> list:
+        # Redis keeps recent payloads and the id indexes, Postgres has every result
+        try:
+            if result_test is not None:
+                return await cls.get_result_data(db, result_test, **kwargs)
 
-        await self.create(db)
+            if not await redis_actions.is_index_built(**kwargs):
+                await redis_actions.build_index(await cls.get_scores(db, **kwargs), **kwargs)
 
-        for i, question in enumerate(quiz.questions):
-            new_question = ResultQuestionModel(
-                id_result=self.id,
-                question=question.question,
-                answer_is_correct=checking_answers[i]
-            )
+            ids = await redis_actions.get_result_ids(skip, limit, date_from, date_to, **kwargs)
+            results = await redis_actions.get_results(ids)
 
-            await new_question.create_with_answers(db, user_answers[i])
+            missing = [result_id for result_id in ids if result_id not in results]
 
-        await db.refresh(self)
+            if missing:
+                loaded = await cls.load_results_data(db, cls.id.in_(missing))
+                await redis_actions.cache_results(loaded)
 
-        await add_test_result_to_redis(
-            self.id,
-            self.id_user,
-            self.id_company,
-            self.id_quiz,
-            ResultData.model_validate(self).model_dump()
-        )
+                results.update((result['id'], result) for result in loaded)
+
+                # Results deleted in Postgres
+                gone = [result_id for result_id in missing if result_id not in results]
+
+                if gone:
+                    await redis_actions.remove_from_index(gone, **kwargs)
+
+            return [results[result_id] for result_id in ids if result_id in results]
+
+        except RedisUnavailable:
+            if result_test is not None:
+                kwargs['id'] = result_test
+
+            filters = [getattr(cls, field) == value for field, value in kwargs.items()]
 
+            if date_from:
+                filters.append(cls.created_at >= redis_actions.as_utc(date_from))
 
-class ResultQuestionCrud:
-    async def create_with_answers(self, db: AsyncSession, answers: list):
-        from quiz.models.models import UserAnswerModel
+            if date_to:
+                filters.append(cls.created_at <= redis_actions.as_utc(date_to))
 
-        await self.create(db)
+            return await cls.load_results_data(db, *filters, skip=skip, limit=limit)
 
-        for answer in answers:
-            new_answer = UserAnswerModel(id_result_question=self.id, answer=answer)
+    @classmethod
+    async def get_result_data(cls, db: AsyncSession, result_test: int, **kwargs) -> list:
+        result = (await redis_actions.get_results([result_test])).get(result_test)
 
-            await new_answer.create(db)
+        if result and all(result[field] == value for field, value in kwargs.items()):
+            return [result]
 
-        await db.refresh(self)
+        results = await cls.load_results_data(db, cls.id == result_test,
+                                              *[getattr(cls, field) == value for field, value in kwargs.items()])
+        await redis_actions.cache_results(results)
+
+        return results
+
+    @classmethod
+    async def get_scores(cls, db: AsyncSession, **kwargs) -> dict:
+        rows = await db.execute(select(cls.id, cls.created_at).filter_by(**kwargs))
+
+        return {result_id: redis_actions.result_score(created_at) for result_id, created_at in rows}
+
+    @classmethod
+    async def load_results_data(cls, db: AsyncSession, *filters, skip: int = 0, limit: int = None) -> list:
+        query = select(cls).where(*filters).order_by(cls.created_at.desc(), cls.id.desc()).offset(skip).limit(limit)
+        query = query.options(*cls.loading_options('result-with-answers'))
+
+        return [ResultData.model_validate(result).model_dump() for result in await db.scalars(query)]
+
+    async def create_with_questions(self, db: AsyncSession, quiz, user_answers: list, checking_answers: list):
+        from quiz.models.models import ResultQuestionModel, UserAnswerModel
+
+        # The whole submission is written with three statements and left uncommitted for the caller
+        db.add(self)
+        await db.flush()
+
+        question_ids = await ResultQuestionModel.bulk_insert(db, [
+            {'id_result': self.id, 'question': question.question, 'answer_is_correct': checking_answers[i]}
+            for i, question in enumerate(quiz.questions)
+        ])
+
+        await UserAnswerModel.bulk_insert(db, [
+            {'id_result_question': question_id, 'answer': answer}
+            for question_id, answers in zip(question_ids, user_answers)
+            for answer in answers
+        ])
+
+    def result_data(self, quiz, user_answers: list, checking_answers: list) -> dict:
+        return ResultData(
+            id=self.id,
+            id_user=self.id_user,
+            id_company=self.id_company,
+            id_quiz=self.id_quiz,
+            # The flushed default is a naive utcnow, rows read back from Postgres are UTC-aware
+            created_at=self.created_at.replace(tzinfo=self.created_at.tzinfo or timezone.utc),
+            questions=[
+                ResultQuestion(
+                    question=question.question,
+                    answer_is_correct=checking_answers[i],
+                    user_answers=user_answers[i]
+                )
+                for i, question in enumerate(quiz.questions)
+            ]
+        ).model_dump()
@@ -1,28 +1,40 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from db.models import BaseModel
-from quiz.models.crud import QuestionCrud, QuizCrud, ResultTestCrud, ResultQuestionCrud
+from db.pagination import page_indexes
+from quiz.models.crud import QuestionCrud, QuizCrud, ResultTestCrud
 
 
 class AnswerModel(BaseModel):
     __tablename__ = "answer"
 
     answer = Column(String, nullable=False)
-    id_question = Column(Integer, ForeignKey("question.id"), nullable=False)
+    id_question = Column(Integer, ForeignKey("question.id"), nullable=False, index=True)
     is_correct = Column(Boolean, nullable=False)
 
-    question = relationship("QuestionModel", back_populates="answers", lazy="subquery")
+    question = relationship("QuestionModel", back_populates="answers", lazy="raise")
 
 
 class QuestionModel(BaseModel, QuestionCrud):
     __tablename__ = "question"
 
     question = Column(String, nullable=False)
-    id_quiz = Column(Integer, ForeignKey("quiz.id"), nullable=False)
+    id_quiz = Column(Integer, ForeignKey("quiz.id"), nullable=False, index=True)
 
-    quiz = relationship("QuizModel", back_populates="questions", lazy="subquery")
-    answers = relationship("AnswerModel", cascade="all, delete-orphan", back_populates="question", lazy="subquery")
+    quiz = relationship("QuizModel", back_populates="questions", lazy="raise")
+    answers = relationship(
+        "AnswerModel",
+        cascade="all, delete-orphan",
+        back_populates="question",
+        lazy="raise",
+        order_by="AnswerModel.id"
+    )
+
+    loading_profiles = {
+        'company-roles': ('quiz.company.roles',),
+        'question-with-answers': ('quiz.company.roles', 'answers'),
+    }
 
 
 class QuizModel(BaseModel, QuizCrud):
@@ -33,8 +45,21 @@ class QuizModel(BaseModel, QuizCrud):
     count_day = Column(Integer, nullable=False)
     id_company = Column(Integer, ForeignKey("company.id"), nullable=False)
 
-    company = relationship("CompanyModel", back_populates="quizzes", lazy="subquery")
-    questions = relationship("QuestionModel", cascade="all, delete-orphan", back_populates="quiz", lazy="subquery")
+    company = relationship("CompanyModel", back_populates="quizzes", lazy="raise")
+    questions = relationship(
+        "QuestionModel",
+        cascade="all, delete-orphan",
+        back_populates="quiz",
+        lazy="raise",
+        order_by="QuestionModel.id"
+    )
+
+    __table_args__ = page_indexes('quiz', 'id_company')
+
+    loading_profiles = {
+        'company-roles': ('company.roles',),
+        'quiz-with-questions': ('company.roles', 'questions.answers'),
+    }
 
 
 class ResultTestModel(BaseModel, ResultTestCrud):
@@ -46,21 +71,31 @@ class ResultTestModel(BaseModel, ResultTestCrud):
     id_company = Column(Integer, ForeignKey("company.id"), nullable=False)
     id_quiz = Column(Integer, ForeignKey("quiz.id", ondelete="CASCADE"), nullable=False)
 
-    questions = relationship("ResultQuestionModel", cascade="all, delete-orphan", lazy="subquery")
+    __table_args__ = (
+        Index('ix_resul_test_id_user_id_company', 'id_user', 'id_company'),
+        Index('ix_resul_test_id_user_id_quiz', 'id_user', 'id_quiz'),
+        Index('ix_resul_test_id_company_id_quiz', 'id_company', 'id_quiz'),
+    )
+
+    questions = relationship("ResultQuestionModel", cascade="all, delete-orphan", lazy="raise")
+
+    loading_profiles = {
+        'result-with-answers': ('questions.user_answers',),
+    }
 
 
-class ResultQuestionModel(BaseModel, ResultQuestionCrud):
+class ResultQuestionModel(BaseModel):
     __tablename__ = "result_question"
 
-    id_result = Column(Integer, ForeignKey("resul_test.id"), nullable=False)
+    id_result = Column(Integer, ForeignKey("resul_test.id", ondelete="CASCADE"), nullable=False, index=True)
     question = Column(String, nullable=False)
     answer_is_correct = Column(Boolean, nullable=False)
 
-    user_answers = relationship("UserAnswerModel", cascade="all, delete-orphan", lazy="subquery")
+    user_answers = relationship("UserAnswerModel", cascade="all, delete-orphan", lazy="raise")
 
 
 class UserAnswerModel(BaseModel):
     __tablename__ = "user_answer"
 
     answer = Column(String, nullable=False)
-    id_result_question = Column(Integer, ForeignKey("result_question.id"), nullable=False)
\ No newline at end of file
+    id_result_question = Column(Integer, ForeignKey("result_question.id", ondelete="CASCADE"), nullable=False, index=True)
\ No newline at end of file
@@ -17,7 +17,7 @@ async def update_question(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    question = await QuestionModel.get_by_id(db, question_id)
+    question = await QuestionModel.get_by_id(db, question_id, profile='question-with-answers')
 
     if not question.quiz.company.user_entitled_quiz(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No update permission')
@@ -33,7 +33,7 @@ async def delete_question(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    question = await QuestionModel.get_by_id(db, question_id)
+    question = await QuestionModel.get_by_id(db, question_id, profile='company-roles')
 
     if not question.quiz.company.user_entitled_quiz(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No delete permission')
@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from analytic.cache import analytic_cache
+from analytic.models.models import LastPassModel
 from auth.auth import jwt_bearer
+from db import redis_actions
 from db.database import get_async_session
+from db.redis import RedisUnavailable
 from company.models.models import CompanyModel
 from quiz.schemas import (
     QuizSchema,
@@ -13,7 +17,8 @@ from quiz.schemas import (
     PassTestRequest,
     ResultTestSchema
 )
-from quiz.models.models import QuizModel
+from log import logger
+from quiz.models.models import QuizModel, ResultTestModel
 from user.models.models import UserModel, NotificationModel
 
 router = APIRouter(prefix='/quiz')
@@ -21,7 +26,7 @@ router = APIRouter(prefix='/quiz')
 
 @router.get("/{quiz_id}/", response_model=QuizWithQuestion)
 async def get_quiz(quiz_id: int, user: UserModel = Depends(jwt_bearer), db: AsyncSession = Depends(get_async_session)):
-    quiz = await QuizModel.get_by_id(db, quiz_id)
+    quiz = await QuizModel.get_by_id(db, quiz_id, profile='quiz-with-questions')
 
     if not quiz.company.is_user_in_company(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='A user cannot take quizzes from outside their company')
@@ -36,7 +41,7 @@ async def create_quiz(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    company = await CompanyModel.get_by_id(db, company_id)
+    company = await CompanyModel.get_by_id(db, company_id, profile='members')
 
     if not company.user_entitled_quiz(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No create permission')
@@ -52,12 +57,27 @@ async def create_quiz(
 
 @router.delete("/{quiz_id}/")
 async def delete_quiz(quiz_id: int, user: UserModel = Depends(jwt_bearer), db: AsyncSession = Depends(get_async_session)):
-    quiz = await QuizModel.get_by_id(db, quiz_id)
+    quiz = await QuizModel.get_by_id(db, quiz_id, profile='company-roles')
 
     if not quiz.company.user_entitled_quiz(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No delete permission')
 
-    return await quiz.delete(db)
+    # The quiz results are removed with it by the foreign keys, their cached copies and the analytics
+    # of everyone who passed it go stale
+    passed = await LastPassModel.get_columns(db, ('id_user',), id_company=quiz.id_company, id_quiz=quiz.id)
+    results = await ResultTestModel.get_columns(db, ('id', 'id_user', 'id_company', 'id_quiz'), id_quiz=quiz.id)
+
+    result = await quiz.delete(db)
+
+    await analytic_cache.bump(quiz.id_company, [row.id_user for row in passed])
+
+    try:
+        await redis_actions.remove_results([row._asdict() for row in results])
+
+    except RedisUnavailable:
+        logger.warning(f"Cached results of quiz {quiz.id} were not removed, redis is unavailable")
+
+    return result
 
 
 @router.put("/{quiz_id}/update_info/", response_model=QuizSchema, status_code=status.HTTP_201_CREATED)
@@ -67,7 +87,7 @@ async def update_info_quiz(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    quiz = await QuizModel.get_by_id(db, quiz_id)
+    quiz = await QuizModel.get_by_id(db, quiz_id, profile='company-roles')
 
     if not quiz.company.user_entitled_quiz(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No update permission')
@@ -84,7 +104,7 @@ async def add_question_to_quiz(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    quiz = await QuizModel.get_by_id(db, quiz_id)
+    quiz = await QuizModel.get_by_id(db, quiz_id, profile='quiz-with-questions')
 
     if not quiz.company.user_entitled_quiz(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No update permission')
@@ -101,7 +121,7 @@ async def pass_test(
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
-    quiz = await QuizModel.get_by_id(db, quiz_id)
+    quiz = await QuizModel.get_by_id(db, quiz_id, profile='quiz-with-questions')
 
     if not quiz.company.is_user_in_company(user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='A user cannot take quizzes from outside their company')
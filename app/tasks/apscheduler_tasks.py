@@ -2,14 +2,14 @@ from apscheduler.schedulers.background import BackgroundScheduler
 import smtplib as smtp
 from email.mime.text import MIMEText
 
+from sqlalchemy import select
+
 from config import global_settings
-from db.database import get_sync_session
+from db.database import get_sync_session, stream
 from user.models.models import UserModel
 
 
 def make_emails(users):
-    emails = []
-
     for user in users:
         msg = MIMEText(f' Hello, {user.username}! You want to know a good deal?')
 
@@ -17,21 +17,19 @@ def make_emails(users):
         msg['To'] = user.email
         msg['Subject'] = 'Advertisement'
 
-        emails.append(msg)
-
-    return emails
+        yield msg
 
 
 def send_ad_email_task():
-    with get_sync_session() as session:
-        users = session.query(UserModel).all()
-
     server = smtp.SMTP(global_settings.smtp_host, global_settings.smtp_port)
     server.starttls()
     server.login(global_settings.smtp_user, global_settings.smtp_password)
 
-    for email in make_emails(users):
-        server.sendmail(email['From'], email['To'], email.as_string())
+    with get_sync_session() as session:
+        users = session.scalars(stream(select(UserModel)))
+
+        for email in make_emails(users):
+            server.sendmail(email['From'], email['To'], email.as_string())
 
     server.quit()
 
@@ -2,11 +2,15 @@ from datetime import datetime, timezone
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
+from sqlalchemy import select
 
+from analytic.models.models import LastPassModel
 from company.models.models import CompanyModel, RoleModel
 from config import global_settings
-from db.database import get_sync_session
-from quiz.models.models import ResultTestModel
+from db.database import get_sync_session, stream, engine_sync
+# Registers the QuizModel mapper that loading_options('quizzes') resolves CompanyModel.quizzes to
+from quiz.models.models import QuizModel
 from user.models.models import UserModel, NotificationModel
 
 celery = Celery('tasks', broker=global_settings.redis_url, backend=global_settings.redis_url)
@@ -14,46 +18,50 @@ celery = Celery('tasks', broker=global_settings.redis_url, backend=global_settin
 celery.conf.timezone = 'Europe/Kiev'
 
 
-@celery.task()
-def check_for_need_pass_quizzes_users():
-    session = get_sync_session()
-
-    users = session.query(UserModel).all()
-
-    for user in users:
-        user_companies = [session.query(CompanyModel).get(role.id_company) for role in
-                          session.query(RoleModel).filter_by(id_user=user.id)]
-
-        for company in user_companies:
-            for quiz in company.quizzes:
-                results = session.query(ResultTestModel).filter_by(
-                    id_user=user.id,
-                    id_quiz=quiz.id
-                ).all()
-
-                if results:
-                    latest_result = max(results, key=lambda result: result.created_at)
+@worker_process_init.connect
+def reset_sync_pool(**kwargs):
+    # Connections inherited from the parent process must not be reused after fork
+    engine_sync.dispose(close=False)
 
-                    now_datetime = datetime.now(timezone.utc)
 
-                    if (now_datetime - latest_result.created_at).total_seconds() > quiz.count_day * 24 * 60 * 60:
-                        session.add(
+@celery.task()
+def check_for_need_pass_quizzes_users():
+    # Users are streamed on one connection, notifications are committed per user on another
+    with get_sync_session() as session, get_sync_session() as write_session:
+        users = session.scalars(stream(select(UserModel)))
+
+        for user in users:
+            user_companies = [session.get(CompanyModel, role.id_company, options=CompanyModel.loading_options('quizzes'))
+                              for role in session.query(RoleModel).filter_by(id_user=user.id)]
+
+            last_passes = {
+                last_pass.id_quiz: last_pass.passed_at
+                for last_pass in session.query(LastPassModel).filter_by(id_user=user.id)
+            }
+
+            for company in user_companies:
+                for quiz in company.quizzes:
+                    passed_at = last_passes.get(quiz.id)
+
+                    if passed_at:
+                        now_datetime = datetime.now(timezone.utc)
+
+                        if (now_datetime - passed_at).total_seconds() > quiz.count_day * 24 * 60 * 60:
+                            write_session.add(
+                                NotificationModel(
+                                    id_user=user.id,
+                                    text=f"It's been a long time since you've had a quiz {quiz.name} at {company.name}!"
+                                )
+                            )
+                    else:
+                        write_session.add(
                             NotificationModel(
                                 id_user=user.id,
-                                text=f"It's been a long time since you've had a quiz {quiz.name} at {company.name}!"
+                                text=f"You have not yet passed the test {quiz.name} in the company {company.name}!"
                             )
                         )
-                else:
-                    session.add(
-                        NotificationModel(
-                            id_user=user.id,
-                            text=f"You have not yet passed the test {quiz.name} in the company {company.name}!"
-                        )
-                    )
-
-                session.commit()
 
-    session.close()
+            write_session.commit()
 
 
 celery.conf.beat_schedule = {
@@ -1,4 +1,7 @@
+from typing import Optional
+
 from fastapi import HTTPException
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
@@ -15,6 +18,15 @@ class UserCrud:
 
         return [await CompanyModel.get_by_id(db, role.id_company) for role in roles]
 
+    async def companies_page(self, db: AsyncSession, cursor: Optional[str], limit: int, order_by: str):
+        # Paged by membership, the cursor points at the role row
+        roles, next_cursor = await RoleModel.get_page(db, cursor, limit, order_by, id_user=self.id)
+
+        companies = await db.scalars(select(CompanyModel).where(CompanyModel.id.in_([role.id_company for role in roles])))
+        companies = {company.id: company for company in companies}
+
+        return [companies[role.id_company] for role in roles], next_cursor
+
     async def invitations(self, db: AsyncSession):
         invitations = await InvitationModel.get_by_fields(db, return_single=False, id_user=self.id)
 
@@ -25,8 +37,8 @@ class UserCrud:
 
         return requests if requests else []
 
-    def user_verification(self, hashed_password: str) -> bool:
-        return Hasher.verify_password(hashed_password, self.hashed_password)
+    async def user_verification(self, password: str) -> bool:
+        return await Hasher.verify_password_async(password, self.hashed_password)
 
     def can_edit(self, user_id: int) -> bool:
         return self.id == user_id
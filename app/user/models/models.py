@@ -1,8 +1,9 @@
 import enum
 
-from sqlalchemy import Boolean, Column, String, Integer, ForeignKey, Enum
+from sqlalchemy import Boolean, Column, String, Integer, ForeignKey, Enum, Index
 
 from db.models import BaseModel
+from db.pagination import page_indexes
 from user.models.crud import UserCrud, NotificationCrud
 
 
@@ -21,6 +22,9 @@ class UserModel(BaseModel, UserCrud):
     is_superuser = Column(Boolean, default=False, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
 
+    # Ordering by id is served by the primary key
+    __table_args__ = (Index('ix_user_created_at_id', 'created_at', 'id'),)
+
 
 class StatusEnum(enum.Enum):
     NEW = "NEW"
@@ -33,3 +37,8 @@ class NotificationModel(BaseModel, NotificationCrud):
     id_user = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
     text = Column(String, nullable=False)
     status = Column(Enum(StatusEnum), nullable=False, default=StatusEnum.NEW.value)
+
+    __table_args__ = (
+        Index('ix_notification_id_user_status', 'id_user', 'status'),
+        *page_indexes('notification', 'id_user'),
+    )
@@ -1,14 +1,15 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import StreamingResponse
 
 from auth.auth import jwt_bearer
 from company.models.models import CompanyModel, RequestModel, RoleModel, InvitationModel, RoleEnum
 from company.schemas import RequestSchema, InvitationSchema, RoleSchema, CompanySchema
-from db.database import get_async_session
-from db.redis_actions import get_values_by_keys, get_value_by_keys
+from db.database import get_async_session, get_primary_session
+from db.pagination import NEXT_CURSOR_HEADER, OrderKey, PageLimit, PageSkip
 from quiz.models.models import ResultTestModel
 from analytic.models.models import AverageScoreCompanyModel, AverageScoreGlobalModel
 from quiz.schemas import ResultData
@@ -21,17 +22,24 @@ from analytic.routers.user import router as user_analytic_router
 router = APIRouter(prefix='/user')
 
 @router.get("/{user_id}/companies/", response_model=List[CompanySchema])
-async def get_requests(
+async def get_companies(
         user_id: int,
-        skip: int = 0,
-        limit: int = 100,
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: PageLimit = 100,
+        order_by: OrderKey = 'id',
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
     if not user.can_read(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
 
-    return (await user.companies(db))[skip:limit]
+    companies, next_cursor = await user.companies_page(db, cursor, limit, order_by)
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return companies
 
 
 @router.get("/{user_id}/company/{company_id}/exit/", response_model=List[CompanySchema])
@@ -39,7 +47,7 @@ async def exit_from_company(
         user_id: int,
         company_id: int,
         user: UserModel = Depends(jwt_bearer),
-        db: AsyncSession = Depends(get_async_session)
+        db: AsyncSession = Depends(get_primary_session)
 ):
     if not user.can_delete(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
@@ -57,11 +65,24 @@ async def exit_from_company(
 
 
 @router.get("/{user_id}/requests/", response_model=List[RequestSchema])
-async def get_requests(user_id: int, user: UserModel = Depends(jwt_bearer), db: AsyncSession = Depends(get_async_session)):
+async def get_requests(
+        user_id: int,
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: PageLimit = 100,
+        order_by: OrderKey = 'id',
+        user: UserModel = Depends(jwt_bearer),
+        db: AsyncSession = Depends(get_async_session)
+):
     if not user.can_read(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
 
-    return await user.requests(db)
+    requests, next_cursor = await RequestModel.get_page(db, cursor, limit, order_by, id_user=user_id)
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return requests
 
 
 @router.post("/{user_id}/request/", response_model=RequestSchema, status_code=status.HTTP_201_CREATED)
@@ -100,11 +121,24 @@ async def delete_invitation(
 
 
 @router.get("/{user_id}/invitations/", response_model=List[InvitationSchema])
-async def get_invitations(user_id: int, user: UserModel = Depends(jwt_bearer), db: AsyncSession = Depends(get_async_session)):
+async def get_invitations(
+        user_id: int,
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: PageLimit = 100,
+        order_by: OrderKey = 'id',
+        user: UserModel = Depends(jwt_bearer),
+        db: AsyncSession = Depends(get_async_session)
+):
     if not user.can_read(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
 
-    return await user.invitations(db)
+    invitations, next_cursor = await InvitationModel.get_page(db, cursor, limit, order_by, id_user=user_id)
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return invitations
 
 
 @router.get("/{user_id}/invitation/{invite_id}/accept/", response_model=RoleSchema)
@@ -112,7 +146,7 @@ async def accept_invitation(
         user_id: int,
         invite_id: int,
         user: UserModel = Depends(jwt_bearer),
-        db: AsyncSession = Depends(get_async_session)
+        db: AsyncSession = Depends(get_primary_session)
 ):
     if not user.can_edit(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
@@ -134,7 +168,7 @@ async def reject_invitation(
         user_id: int,
         invite_id: int,
         user: UserModel = Depends(jwt_bearer),
-        db: AsyncSession = Depends(get_async_session)
+        db: AsyncSession = Depends(get_primary_session)
 ):
     if not user.can_edit(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
@@ -150,27 +184,38 @@ async def reject_invitation(
 @router.get("/{user_id}/test_results/", response_model=List[ResultData])
 async def get_results(
         user_id: int,
-        skip: int = 0,
-        limit: int = 100,
-        user: UserModel = Depends(jwt_bearer)
+        skip: PageSkip = 0,
+        limit: PageLimit = 100,
+        date_from: Optional[datetime] = Query(None, alias='from'),
+        date_to: Optional[datetime] = Query(None, alias='to'),
+        user: UserModel = Depends(jwt_bearer),
+        db: AsyncSession = Depends(get_async_session)
 ):
     if not user.can_read(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
 
-    results = await get_values_by_keys(id_user=user_id)
+    results = await ResultTestModel.get_results_data(
+        db, id_user=user_id, skip=skip, limit=limit, date_from=date_from, date_to=date_to
+    )
 
     if not results:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Results not found")
 
-    return results[skip:limit]
+    return results
 
 
 @router.get("/{user_id}/test_results/csv/")
-async def get_results_csv(user_id, user: UserModel = Depends(jwt_bearer)):
+async def get_results_csv(
+        user_id: int,
+        date_from: Optional[datetime] = Query(None, alias='from'),
+        date_to: Optional[datetime] = Query(None, alias='to'),
+        user: UserModel = Depends(jwt_bearer),
+        db: AsyncSession = Depends(get_async_session)
+):
     if not user.can_read(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
 
-    results = await get_values_by_keys(id_user=user_id)
+    results = await ResultTestModel.get_results_data(db, id_user=user_id, date_from=date_from, date_to=date_to)
 
     if not results:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Results not found")
@@ -191,17 +236,12 @@ async def get_result_by_id(
     if not user.can_read(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
 
-    result_from_redis = await get_value_by_keys(result_test=result_test_id, id_user=user_id)
-
-    if result_from_redis:
-        return result_from_redis
+    results = await ResultTestModel.get_results_data(db, result_test=result_test_id, id_user=user_id)
 
-    result = await ResultTestModel.get_by_fields(db, id_user=user_id, id=result_test_id)
-
-    if not result:
+    if not results:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Result not found")
 
-    return result
+    return results[0]
 
 
 @router.get("/{user_id}/test_result/{result_test_id}/csv/")
@@ -214,15 +254,12 @@ async def get_result_csv(
     if not user.can_read(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
 
-    result_from_redis = await get_value_by_keys(id_user=user_id, result_test=result_test_id)
+    results = await ResultTestModel.get_results_data(db, result_test=result_test_id, id_user=user_id)
 
-    if not result_from_redis:
-        result = await ResultTestModel.get_by_fields(db, id_user=user_id, id=result_test_id)
-
-        if not result:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Result not found")
+    if not results:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Result not found")
 
-    csv = generate_csv_data_as_result(ResultData.model_validate(result).model_dump())
+    csv = generate_csv_data_as_result(ResultData.model_validate(results[0]).model_dump())
 
     return StreamingResponse(csv, media_type="multipart/form-data",
                              headers={"Content-Disposition": f"attachment; filename={FileNameEnum.TEST_RESULT.value}"})
@@ -265,13 +302,20 @@ async def get_company_rating(
 @router.get("/{user_id}/notifications/", response_model=List[NotificationSchema])
 async def get_notifications(
         user_id: int,
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: PageLimit = 100,
+        order_by: OrderKey = 'id',
         user: UserModel = Depends(jwt_bearer),
         db: AsyncSession = Depends(get_async_session)
 ):
     if not user.can_read(user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No permission")
 
-    notifications = await NotificationModel.get_by_fields(db, return_single=False, id_user=user_id)
+    notifications, next_cursor = await NotificationModel.get_page(db, cursor, limit, order_by, id_user=user_id)
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
     return notifications
 
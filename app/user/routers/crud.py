@@ -1,11 +1,13 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.auth import jwt_bearer
+from auth.principal import principal_cache
 from company.models.models import RoleModel, RoleEnum
 from db.database import get_async_session
+from db.pagination import NEXT_CURSOR_HEADER, OrderKey, PageLimit
 from user.schemas import UserSchema, UserCreateRequest, UserUpdateRequest, UserCreateData
 from user.models.models import UserModel
 from utils.hashing import Hasher
@@ -14,8 +16,17 @@ router = APIRouter(prefix='/user')
 
 
 @router.get("/", response_model=List[UserSchema], dependencies=[Depends(jwt_bearer)])
-async def get_users(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_session)):
-    users = await UserModel.get_all(db, skip, limit)
+async def get_users(
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: PageLimit = 100,
+        order_by: OrderKey = 'id',
+        db: AsyncSession = Depends(get_async_session)
+):
+    users, next_cursor = await UserModel.get_page(db, cursor, limit, order_by)
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
     return users
 
@@ -32,7 +43,7 @@ async def create_user(request: UserCreateRequest, db: AsyncSession = Depends(get
     new_user = UserModel(
         email=request.email,
         username=request.username,
-        hashed_password=Hasher.get_password_hash(request.password)
+        hashed_password=await Hasher.get_password_hash_async(request.password)
     )
 
     await new_user.create(db)
@@ -52,7 +63,8 @@ async def update_user(
     if not user.can_edit(affected_user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='This user cannot change the data')
 
-    await affected_user.update(db, UserCreateData(data))
+    await affected_user.update(db, UserCreateData(data, await Hasher.get_password_hash_async(data.password)))
+    await principal_cache.invalidate(affected_user.email)
 
     return user
 
@@ -73,4 +85,7 @@ async def delete_user(
     if not user.can_delete(affected_user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='This user cannot delete')
 
-    return await affected_user.delete(db)
+    deleted = await affected_user.delete(db)
+    await principal_cache.invalidate(affected_user.email)
+
+    return deleted
@@ -1,18 +1,18 @@
 from datetime import datetime
+from typing import Optional
 
 from pydantic_core.core_schema import FieldValidationInfo
 from pydantic import BaseModel, EmailStr, field_validator
 from pydantic_settings import SettingsConfigDict
 
 from user.models.models import StatusEnum
-from utils.hashing import Hasher
 
 
 class UserSchema(BaseModel):
     id: int
     email: EmailStr
     username: str
-    hashed_password: str
+    hashed_password: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     is_active: bool = True
@@ -46,9 +46,9 @@ class UserCreateData:
     username: str
     hashed_password: str
 
-    def __init__(self, new_data: UserUpdateRequest):
+    def __init__(self, new_data: UserUpdateRequest, hashed_password: str):
         self.username = new_data.username
-        self.hashed_password = Hasher.get_password_hash(new_data.password)
+        self.hashed_password = hashed_password
 
     def __iter__(self):
         return iter(vars(self).items())
@@ -1,8 +1,76 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+import metrics
+from config import global_settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class HashingPool:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hasher')
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+    async def run(self, func, *args):
+        # bcrypt releases the GIL, the threads hash in parallel while the event loop keeps serving requests
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Server is busy, try again later',
+                                headers={'Retry-After': '1'})
+
+        self.pending += 1
+        queued = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+
+            return func(*args), started, time.perf_counter()
+
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        self.wait_total += started - queued
+        self.run_total += finished - started
+        self.run_max = max(self.run_max, finished - started)
+
+        return result
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'in_flight': min(self.pending, self.workers),
+            'queued': max(self.pending - self.workers, 0),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'wait_avg_ms': round(self.wait_total / self.completed * 1000, 3) if self.completed else 0.0,
+            'run_avg_ms': round(self.run_total / self.completed * 1000, 3) if self.completed else 0.0,
+            'run_max_ms': round(self.run_max * 1000, 3),
+        }
+
+
+hashing_pool = HashingPool(global_settings.hash_workers, global_settings.hash_max_queue)
+
+metrics.register('hashing', hashing_pool.stats)
+
+
 class Hasher:
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -11,3 +79,11 @@ class Hasher:
     @staticmethod
     def get_password_hash(password: str) -> str:
         return pwd_context.hash(password)
+
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        return await hashing_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+    @staticmethod
+    async def get_password_hash_async(password: str) -> str:
+        return await hashing_pool.run(pwd_context.hash, password)
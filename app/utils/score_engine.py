@@ -0,0 +1,91 @@
+from typing import Literal, get_args
+
+import numpy as np
+
+SECONDS_IN_DAY = 86400
+
+# 1970-01-01 was a Thursday, shifting by 3 days puts week boundaries on Mondays
+WEEK_OFFSET = 3
+
+Bucket = Literal['day', 'week', 'month']
+
+
+class ScoreFrame:
+    # Results as parallel arrays: created_at in epoch seconds, ids, and correct/total counts per result
+    def __init__(self, created_at: np.ndarray, id_user: np.ndarray, id_quiz: np.ndarray,
+                 correct: np.ndarray, total: np.ndarray):
+        self.created_at = created_at
+        self.id_user = id_user
+        self.id_quiz = id_quiz
+        self.correct = correct
+        self.total = total
+
+    @classmethod
+    def from_rows(cls, rows) -> 'ScoreFrame':
+        # rows need created_at, id_user, id_quiz, count_correct_answers and count_questions
+        count = len(rows)
+
+        return cls(
+            np.fromiter((row.created_at.timestamp() for row in rows), dtype=np.int64, count=count),
+            np.fromiter((row.id_user for row in rows), dtype=np.int64, count=count),
+            np.fromiter((row.id_quiz for row in rows), dtype=np.int64, count=count),
+            np.fromiter((row.count_correct_answers for row in rows), dtype=np.int64, count=count),
+            np.fromiter((row.count_questions for row in rows), dtype=np.int64, count=count),
+        )
+
+    def __len__(self):
+        return len(self.created_at)
+
+    def buckets(self, bucket: Bucket = 'day') -> np.ndarray:
+        days = self.created_at // SECONDS_IN_DAY
+
+        if bucket == 'day':
+            return days.astype('datetime64[D]')
+
+        if bucket == 'week':
+            return (days - (days + WEEK_OFFSET) % 7).astype('datetime64[D]')
+
+        if bucket == 'month':
+            return days.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]')
+
+        raise ValueError(f"Unknown bucket {bucket}, expected one of {', '.join(get_args(Bucket))}")
+
+    def by_time(self, bucket: Bucket = 'day', cumulative: bool = True) -> list:
+        # Rating per bucket, or the running rating up to the end of each bucket like avarage_quiz_score_by_time
+        dates, index = np.unique(self.buckets(bucket), return_inverse=True)
+
+        correct = np.bincount(index, weights=self.correct, minlength=len(dates))
+        total = np.bincount(index, weights=self.total, minlength=len(dates))
+
+        if cumulative:
+            correct, total = np.cumsum(correct), np.cumsum(total)
+
+        return [{'date': date, 'rating': rating} for date, rating in zip(dates.tolist(), (correct / total).tolist())]
+
+    def by_user(self) -> list:
+        return self.group_by(self.id_user, 'id_user')
+
+    def by_quiz(self) -> list:
+        return self.group_by(self.id_quiz, 'id_quiz')
+
+    def group_by(self, keys: np.ndarray, name: str) -> list:
+        ids, index, results = np.unique(keys, return_inverse=True, return_counts=True)
+
+        correct = np.bincount(index, weights=self.correct, minlength=len(ids))
+        total = np.bincount(index, weights=self.total, minlength=len(ids))
+
+        return [
+            {name: key, 'rating': rating, 'results': count}
+            for key, rating, count in zip(ids.tolist(), (correct / total).tolist(), results.tolist())
+        ]
+
+    def scores(self) -> np.ndarray:
+        return self.correct / self.total
+
+    def percentiles(self, q=(25, 50, 75, 90, 99)) -> dict:
+        return dict(zip(q, np.percentile(self.scores(), q).tolist()))
+
+    def histogram(self, bins: int = 10) -> dict:
+        counts, edges = np.histogram(self.scores(), bins=bins, range=(0, 1))
+
+        return {'edges': edges.tolist(), 'counts': counts.tolist()}
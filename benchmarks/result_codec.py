@@ -0,0 +1,98 @@
+"""Redis memory and decode throughput of cached ResultData: plain JSON vs the compact codec.
+
+Writes COUNT payloads per quiz shape under a scratch key prefix in the configured Redis and deletes them afterwards:
+
+    python benchmarks/result_codec.py
+"""
+import json
+import os
+import sys
+import time
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+
+sys.path.insert(0, SOURCE_DIR)
+
+import redis
+
+from config import global_settings
+from db.codec import encode_result, decode_result
+
+COUNT = 100_000
+BATCH = 1000
+SHAPES = [(5, 1), (10, 2), (30, 3)]
+PREFIX = 'bench:result_codec'
+
+
+def make_result(result_id: int, count_questions: int, count_answers: int) -> dict:
+    return {
+        'id': result_id,
+        'id_user': result_id % 5000 + 1,
+        'id_company': 1,
+        'id_quiz': 1,
+        'created_at': '2023-07-20T10:00:00.123456+00:00',
+        'questions': [
+            {
+                'question': f"Which of the following statements about topic number {i} are correct?",
+                'answer_is_correct': (result_id + i) % 3 != 0,
+                'user_answers': [f"Statement {j} describing topic number {i}" for j in range(count_answers)]
+            }
+            for i in range(count_questions)
+        ]
+    }
+
+
+def store(client, name: str, payloads: list) -> int:
+    # used_memory delta covers the value, the key and the dict entry overhead
+    before = client.info('memory')['used_memory']
+
+    for start in range(0, len(payloads), BATCH):
+        with client.pipeline(transaction=False) as pipe:
+            for i, payload in enumerate(payloads[start:start + BATCH], start):
+                pipe.set(f"{PREFIX}:{name}:{i}", payload)
+
+            pipe.execute()
+
+    used = client.info('memory')['used_memory'] - before
+
+    for start in range(0, len(payloads), BATCH):
+        client.delete(*[f"{PREFIX}:{name}:{i}" for i in range(start, min(start + BATCH, len(payloads)))])
+
+    return used
+
+
+def throughput(decode, payloads: list) -> float:
+    started = time.perf_counter()
+
+    for payload in payloads:
+        decode(payload)
+
+    return len(payloads) / (time.perf_counter() - started)
+
+
+def main():
+    client = redis.Redis.from_url(global_settings.redis_url)
+
+    print(f"{'questions x answers':>20} {'codec':>8} {'avg bytes':>10} {'redis MB':>9} {'decode/s':>10}")
+
+    for count_questions, count_answers in SHAPES:
+        results = [make_result(i, count_questions, count_answers) for i in range(1, COUNT + 1)]
+
+        codecs = (
+            ('json', lambda result: json.dumps(result).encode(), json.loads),
+            ('compact', encode_result, decode_result),
+        )
+
+        for name, encode, decode in codecs:
+            payloads = [encode(result) for result in results]
+
+            average = sum(map(len, payloads)) / len(payloads)
+            used = store(client, name, payloads)
+            rate = throughput(decode, payloads)
+
+            print(f"{f'{count_questions} x {count_answers}':>20} {name:>8} {average:>10.0f} "
+                  f"{used / 2 ** 20:>9.1f} {rate:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Commits and statements per quiz submission: row-by-row writes vs the single-transaction bulk path.
+
+Runs against the test database from the settings, creates the schema and drops it afterwards:
+
+    python benchmarks/result_write.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+
+sys.path.insert(0, SOURCE_DIR)
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+# Registers the rating, rollup and stat tables in metadata, pass_test writes to them
+from analytic.models import models
+from company.models.models import CompanyModel, RoleModel, RoleEnum
+from config import global_settings
+from db.database import metadata
+from quiz.models.models import QuizModel, ResultTestModel, ResultQuestionModel, UserAnswerModel
+from quiz.schemas import QuizData, QuestionData, AnswerData
+from user.models.models import UserModel
+
+SIZES = [(10, 2), (50, 4), (100, 4)]
+ROUNDS = 5
+
+
+class Counter:
+    def __init__(self, engine):
+        self.commits = 0
+        self.statements = 0
+
+        event.listen(engine.sync_engine, 'commit', self.on_commit)
+        event.listen(engine.sync_engine, 'before_cursor_execute', self.on_statement)
+
+    def on_commit(self, *args):
+        self.commits += 1
+
+    def on_statement(self, *args):
+        self.statements += 1
+
+    def reset(self):
+        self.commits = self.statements = 0
+
+
+async def legacy_create_with_questions(db, result_test, quiz, user_answers, checking_answers):
+    # The per-row implementation that used to back pass_test
+    await result_test.create(db)
+
+    for i, question in enumerate(quiz.questions):
+        new_question = ResultQuestionModel(
+            id_result=result_test.id,
+            question=question.question,
+            answer_is_correct=checking_answers[i]
+        )
+
+        await new_question.create(db)
+
+        for answer in user_answers[i]:
+            await UserAnswerModel(id_result_question=new_question.id, answer=answer).create(db)
+
+        await db.refresh(new_question)
+
+    await db.refresh(result_test)
+
+
+async def bulk_create_with_questions(db, result_test, quiz, user_answers, checking_answers):
+    await result_test.create_with_questions(db, quiz, user_answers, checking_answers)
+    await result_test.commit(db)
+
+
+async def make_quiz(db, company, count_questions, count_answers):
+    data = QuizData(name='bench', description='bench', count_day=1, questions=[
+        QuestionData(
+            question=f"question {i}",
+            answers=[AnswerData(answer=f"answer {j}", is_correct=j == 0) for j in range(count_answers)]
+        )
+        for i in range(count_questions)
+    ])
+
+    quiz = QuizModel(name=data.name, description=data.description, count_day=data.count_day, id_company=company.id)
+
+    await quiz.create_with_questions(db, data)
+
+    return await quiz.load_profile(db, 'quiz-with-questions')
+
+
+async def run(db, counter, write, user, quiz, count_answers):
+    answers = [list(range(count_answers)) for _ in quiz.questions]
+    user_answers = quiz.add_text_to_answers(answers)
+    checking_answers = [set(answer) == set(quiz.get_correct_answer_for_question(i)) for i, answer in enumerate(answers)]
+
+    counter.reset()
+    started = time.perf_counter()
+
+    for _ in range(ROUNDS):
+        result_test = ResultTestModel(
+            id_user=user.id,
+            id_quiz=quiz.id,
+            id_company=quiz.id_company,
+            count_correct_answers=checking_answers.count(True),
+            count_questions=len(quiz.questions)
+        )
+
+        await write(db, result_test, quiz, user_answers, checking_answers)
+
+    elapsed = (time.perf_counter() - started) / ROUNDS
+
+    return counter.commits / ROUNDS, counter.statements / ROUNDS, elapsed * 1000
+
+
+async def main():
+    engine = create_async_engine(global_settings.postgresql_test_url, poolclass=NullPool)
+    session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    counter = Counter(engine)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+
+    try:
+        async with session_maker() as db:
+            user = UserModel(email='bench@example.com', username='bench', hashed_password='-')
+            company = CompanyModel(name='bench', description='bench')
+            db.add_all([user, company])
+            await db.flush()
+            db.add(RoleModel(id_user=user.id, id_company=company.id, role=RoleEnum.OWNER))
+            await db.commit()
+
+            print(f"{'questions x answers':>20} {'path':>8} {'commits':>8} {'statements':>11} {'ms':>8}")
+
+            for count_questions, count_answers in SIZES:
+                quiz = await make_quiz(db, company, count_questions, count_answers)
+
+                for name, write in (('legacy', legacy_create_with_questions), ('bulk', bulk_create_with_questions)):
+                    commits, statements, ms = await run(db, counter, write, user, quiz, count_answers)
+
+                    print(f"{f'{count_questions} x {count_answers}':>20} {name:>8} {commits:>8.0f} {statements:>11.0f} {ms:>8.1f}")
+
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.drop_all)
+
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
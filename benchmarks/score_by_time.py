@@ -0,0 +1,82 @@
+"""avarage_quiz_score_by_time: the previous history re-summing version vs the running-sum generator.
+
+Pure Python, no database needed:
+
+    python benchmarks/score_by_time.py
+"""
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+
+sys.path.insert(0, SOURCE_DIR)
+
+from utils.analytic import avarage_quiz_score_by_time
+
+ResultRow = namedtuple('ResultRow', ['count_correct_answers', 'count_questions', 'created_at'])
+
+SIZES = [(100_000, 30), (100_000, 365), (1_000_000, 30), (1_000_000, 365)]
+
+# The legacy version is O(days x results), bigger runs take minutes
+LEGACY_MAX_WORK = 50_000_000
+
+
+def legacy_avarage_quiz_score_by_time(data):
+    data_by_date = {}
+    for item in data:
+        created_at_date = item.created_at.date()
+        if created_at_date not in data_by_date:
+            data_by_date[created_at_date] = []
+        data_by_date[created_at_date].append(item)
+
+    result, history = [], []
+    for date, data_list in data_by_date.items():
+        history.extend(data_list)
+        total_correct_answers = sum(item.count_correct_answers for item in history)
+        total_questions = sum(item.count_questions for item in history)
+        result.append({'date': date, 'rating': total_correct_answers / total_questions})
+
+    return result
+
+
+def make_results(count: int, days: int) -> list:
+    generator = random.Random(0)
+    start = datetime(2023, 1, 1)
+
+    results = []
+    for _ in range(count):
+        count_questions = generator.randint(1, 10)
+        results.append(ResultRow(
+            count_correct_answers=generator.randint(0, count_questions),
+            count_questions=count_questions,
+            created_at=start + timedelta(days=generator.randrange(days), seconds=generator.randrange(86400)),
+        ))
+
+    return sorted(results, key=lambda item: item.created_at)
+
+
+def timed(func, data) -> float:
+    started = time.perf_counter()
+    list(func(data))
+
+    return time.perf_counter() - started
+
+
+def main():
+    print(f"{'results':>10} {'days':>6} {'legacy s':>10} {'running s':>10}")
+
+    for count, days in SIZES:
+        results = make_results(count, days)
+
+        legacy = f"{timed(legacy_avarage_quiz_score_by_time, results):.2f}" if count * days <= LEGACY_MAX_WORK else '-'
+        running = timed(avarage_quiz_score_by_time, results)
+
+        print(f"{count:>10} {days:>6} {legacy:>10} {running:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Company score summary on 10^6 results: dict loops over rows vs the NumPy ScoreFrame.
+
+Pure Python, no database needed:
+
+    python benchmarks/score_engine.py
+"""
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+
+sys.path.insert(0, SOURCE_DIR)
+
+from utils.analytic import avarage_quiz_score_by_time
+from utils.score_engine import ScoreFrame
+
+COUNT = 1_000_000
+DAYS = 365
+USERS = 5_000
+QUIZZES = 200
+PERCENTILES = (25, 50, 75, 90, 99)
+BINS = 10
+
+ScoreRow = namedtuple('ScoreRow', ['created_at', 'id_user', 'id_quiz', 'count_correct_answers', 'count_questions'])
+
+
+def make_rows() -> list:
+    generator = random.Random(0)
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    rows = []
+    for _ in range(COUNT):
+        count_questions = generator.randint(1, 10)
+        rows.append(ScoreRow(
+            start + timedelta(days=generator.randrange(DAYS), seconds=generator.randrange(86400)),
+            generator.randint(1, USERS),
+            generator.randint(1, QUIZZES),
+            generator.randint(0, count_questions),
+            count_questions
+        ))
+
+    return sorted(rows, key=lambda row: row.created_at)
+
+
+def loop_group_by(rows, name: str) -> list:
+    totals = {}
+    for row in rows:
+        item = totals.setdefault(getattr(row, name), [0, 0, 0])
+        item[0] += row.count_correct_answers
+        item[1] += row.count_questions
+        item[2] += 1
+
+    return [{name: key, 'rating': c / q, 'results': n} for key, (c, q, n) in totals.items()]
+
+
+def loop_percentiles(rows) -> dict:
+    scores = sorted(row.count_correct_answers / row.count_questions for row in rows)
+
+    return {q: scores[round(q / 100 * (len(scores) - 1))] for q in PERCENTILES}
+
+
+def loop_histogram(rows) -> list:
+    counts = [0] * BINS
+    for row in rows:
+        counts[min(int(row.count_correct_answers / row.count_questions * BINS), BINS - 1)] += 1
+
+    return counts
+
+
+def timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+
+    return time.perf_counter() - started
+
+
+def main():
+    rows = make_rows()
+
+    load = timed(ScoreFrame.from_rows, rows)
+    frame = ScoreFrame.from_rows(rows)
+
+    cases = [
+        ('by_time', lambda: list(avarage_quiz_score_by_time(rows)), frame.by_time),
+        ('by_user', lambda: loop_group_by(rows, 'id_user'), frame.by_user),
+        ('by_quiz', lambda: loop_group_by(rows, 'id_quiz'), frame.by_quiz),
+        ('percentiles', lambda: loop_percentiles(rows), lambda: frame.percentiles(PERCENTILES)),
+        ('histogram', lambda: loop_histogram(rows), lambda: frame.histogram(BINS)),
+    ]
+
+    print(f"{COUNT} results, {DAYS} days, {USERS} users, {QUIZZES} quizzes, from_rows {load:.2f} s")
+    print(f"{'summary':>12} {'loops s':>10} {'numpy s':>10}")
+
+    total_loops, total_numpy = 0, 0
+    for name, loops, vectorized in cases:
+        loops, vectorized = timed(loops), timed(vectorized)
+        total_loops, total_numpy = total_loops + loops, total_numpy + vectorized
+
+        print(f"{name:>12} {loops:>10.3f} {vectorized:>10.3f}")
+
+    print(f"{'all':>12} {total_loops:>10.3f} {total_numpy + load:>10.3f} (numpy incl. from_rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -18,7 +18,7 @@ async def create_superuser(email, username, password):
     from utils.hashing import Hasher
 
     async with async_session() as session:
-        hashed_password = Hasher.get_password_hash(password)
+        hashed_password = await Hasher.get_password_hash_async(password)
 
         superuser = UserModel(email=email, username=username, hashed_password=hashed_password, is_superuser=True)
 
@@ -0,0 +1,72 @@
+"""add rating running sums
+
+Revision ID: 6e2feaefcf88
+Revises: c328e61fd7bc
+Create Date: 2026-10-18 10:12:31.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2feaefcf88'
+down_revision = 'c328e61fd7bc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('average_score_company', 'average_score_global'):
+        op.add_column(table, sa.Column('sum_correct', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('sum_questions', sa.Integer(), server_default='0', nullable=False))
+
+    # Keep a single rating row per (user, company) before the upsert key is enforced
+    op.execute("""
+        DELETE FROM average_score_company AS score
+        USING average_score_company AS duplicate
+        WHERE score.id_user = duplicate.id_user
+          AND score.id_company = duplicate.id_company
+          AND score.id > duplicate.id
+    """)
+    op.create_unique_constraint(
+        'average_score_company_id_user_id_company_key',
+        'average_score_company',
+        ['id_user', 'id_company']
+    )
+
+    # Backfill the sums from the stored results
+    op.execute("""
+        INSERT INTO average_score_company (id_user, id_company, sum_correct, sum_questions, rating, created_at, updated_at)
+        SELECT id_user, id_company, SUM(count_correct_answers), SUM(count_questions),
+               SUM(count_correct_answers)::float / SUM(count_questions), now(), now()
+        FROM resul_test
+        GROUP BY id_user, id_company
+        ON CONFLICT (id_user, id_company) DO UPDATE
+        SET sum_correct = excluded.sum_correct,
+            sum_questions = excluded.sum_questions,
+            rating = excluded.rating
+    """)
+    op.execute("""
+        INSERT INTO average_score_global (id_user, sum_correct, sum_questions, rating, created_at, updated_at)
+        SELECT id_user, SUM(count_correct_answers), SUM(count_questions),
+               SUM(count_correct_answers)::float / SUM(count_questions), now(), now()
+        FROM resul_test
+        GROUP BY id_user
+        ON CONFLICT (id_user) DO UPDATE
+        SET sum_correct = excluded.sum_correct,
+            sum_questions = excluded.sum_questions,
+            rating = excluded.rating
+    """)
+
+    for table in ('average_score_company', 'average_score_global'):
+        op.alter_column(table, 'sum_correct', server_default=None)
+        op.alter_column(table, 'sum_questions', server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_constraint('average_score_company_id_user_id_company_key', 'average_score_company', type_='unique')
+
+    for table in ('average_score_company', 'average_score_global'):
+        op.drop_column(table, 'sum_questions')
+        op.drop_column(table, 'sum_correct')
@@ -0,0 +1,54 @@
+"""add last pass
+
+Revision ID: 7c9f2a4d6e81
+Revises: d5b3e8a1c2f4
+Create Date: 2026-10-18 13:21:44.062913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c9f2a4d6e81'
+down_revision = 'd5b3e8a1c2f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'last_pass',
+        sa.Column('id_user', sa.Integer(), nullable=False),
+        sa.Column('id_quiz', sa.Integer(), nullable=False),
+        sa.Column('id_company', sa.Integer(), nullable=False),
+        sa.Column('passed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('count_correct_answers', sa.Integer(), nullable=False),
+        sa.Column('count_questions', sa.Integer(), nullable=False),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['id_company'], ['company.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['id_quiz'], ['quiz.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['id_user'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('id_user', 'id_quiz', 'id_company')
+    )
+    op.create_index(op.f('ix_last_pass_id'), 'last_pass', ['id'], unique=False)
+    op.create_index(op.f('ix_last_pass_id_company'), 'last_pass', ['id_company'], unique=False)
+
+    # Backfill with the latest result of every (user, quiz, company)
+    op.execute("""
+        INSERT INTO last_pass (id_user, id_quiz, id_company, passed_at, count_correct_answers, count_questions,
+                               created_at, updated_at)
+        SELECT DISTINCT ON (id_user, id_quiz, id_company)
+               id_user, id_quiz, id_company, created_at, count_correct_answers, count_questions, now(), now()
+        FROM resul_test
+        ORDER BY id_user, id_quiz, id_company, created_at DESC, id DESC
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_last_pass_id_company'), table_name='last_pass')
+    op.drop_index(op.f('ix_last_pass_id'), table_name='last_pass')
+    op.drop_table('last_pass')
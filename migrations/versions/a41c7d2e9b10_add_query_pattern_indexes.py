@@ -0,0 +1,47 @@
+"""add query pattern indexes
+
+Revision ID: a41c7d2e9b10
+Revises: 6e2feaefcf88
+Create Date: 2026-10-18 11:02:47.518302
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41c7d2e9b10'
+down_revision = '6e2feaefcf88'
+branch_labels = None
+depends_on = None
+
+# average_score_company(id_user, id_company) is already covered by its unique constraint
+INDEXES = [
+    ('ix_resul_test_id_user_id_company', 'resul_test', ['id_user', 'id_company']),
+    ('ix_resul_test_id_user_id_quiz', 'resul_test', ['id_user', 'id_quiz']),
+    ('ix_resul_test_id_company_id_quiz', 'resul_test', ['id_company', 'id_quiz']),
+    ('ix_role_id_company_id_user', 'role', ['id_company', 'id_user']),
+    ('ix_role_id_user', 'role', ['id_user']),
+    ('ix_notification_id_user_status', 'notification', ['id_user', 'status']),
+    ('ix_invitation_id_user', 'invitation', ['id_user']),
+    ('ix_invitation_id_company', 'invitation', ['id_company']),
+    ('ix_request_id_user', 'request', ['id_user']),
+    ('ix_request_id_company', 'request', ['id_company']),
+    ('ix_quiz_id_company', 'quiz', ['id_company']),
+    ('ix_question_id_quiz', 'question', ['id_quiz']),
+    ('ix_answer_id_question', 'answer', ['id_question']),
+    ('ix_result_question_id_result', 'result_question', ['id_result']),
+    ('ix_user_answer_id_result_question', 'user_answer', ['id_result_question']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the tables writable while the indexes build, it can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,63 @@
+"""add question stats
+
+Revision ID: b8e1f7c3a905
+Revises: 7c9f2a4d6e81
+Create Date: 2026-10-18 14:05:52.377120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e1f7c3a905'
+down_revision = '7c9f2a4d6e81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Stored results only keep the question text, so the counters start empty
+    op.create_table(
+        'question_stat',
+        sa.Column('id_question', sa.Integer(), nullable=False),
+        sa.Column('id_quiz', sa.Integer(), nullable=False),
+        sa.Column('id_company', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('correct', sa.Integer(), nullable=False),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['id_company'], ['company.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['id_question'], ['question.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['id_quiz'], ['quiz.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('id_question')
+    )
+    op.create_index(op.f('ix_question_stat_id'), 'question_stat', ['id'], unique=False)
+    op.create_index('ix_question_stat_id_company_id_quiz', 'question_stat', ['id_company', 'id_quiz'], unique=False)
+
+    op.create_table(
+        'answer_stat',
+        sa.Column('id_answer', sa.Integer(), nullable=False),
+        sa.Column('id_question', sa.Integer(), nullable=False),
+        sa.Column('selections', sa.Integer(), nullable=False),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['id_answer'], ['answer.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['id_question'], ['question.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('id_answer')
+    )
+    op.create_index(op.f('ix_answer_stat_id'), 'answer_stat', ['id'], unique=False)
+    op.create_index(op.f('ix_answer_stat_id_question'), 'answer_stat', ['id_question'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_answer_stat_id_question'), table_name='answer_stat')
+    op.drop_index(op.f('ix_answer_stat_id'), table_name='answer_stat')
+    op.drop_table('answer_stat')
+    op.drop_index('ix_question_stat_id_company_id_quiz', table_name='question_stat')
+    op.drop_index(op.f('ix_question_stat_id'), table_name='question_stat')
+    op.drop_table('question_stat')
@@ -0,0 +1,58 @@
+"""add daily score rollup
+
+Revision ID: d5b3e8a1c2f4
+Revises: a41c7d2e9b10
+Create Date: 2026-10-18 12:40:09.731245
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5b3e8a1c2f4'
+down_revision = 'a41c7d2e9b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_score_rollup',
+        sa.Column('id_company', sa.Integer(), nullable=False),
+        sa.Column('id_user', sa.Integer(), nullable=False),
+        sa.Column('id_quiz', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('sum_correct', sa.Integer(), nullable=False),
+        sa.Column('sum_questions', sa.Integer(), nullable=False),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['id_company'], ['company.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['id_user'], ['user.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['id_quiz'], ['quiz.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('id_company', 'id_user', 'id_quiz', 'day')
+    )
+    op.create_index(op.f('ix_daily_score_rollup_id'), 'daily_score_rollup', ['id'], unique=False)
+    op.create_index(
+        'ix_daily_score_rollup_id_user_id_quiz_day',
+        'daily_score_rollup',
+        ['id_user', 'id_quiz', 'day'],
+        unique=False
+    )
+
+    # Backfill from the stored results, days are taken in UTC like the results are written
+    op.execute("""
+        INSERT INTO daily_score_rollup (id_company, id_user, id_quiz, day, sum_correct, sum_questions, created_at, updated_at)
+        SELECT id_company, id_user, id_quiz, (created_at AT TIME ZONE 'UTC')::date,
+               SUM(count_correct_answers), SUM(count_questions), now(), now()
+        FROM resul_test
+        GROUP BY id_company, id_user, id_quiz, (created_at AT TIME ZONE 'UTC')::date
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_daily_score_rollup_id_user_id_quiz_day', table_name='daily_score_rollup')
+    op.drop_index(op.f('ix_daily_score_rollup_id'), table_name='daily_score_rollup')
+    op.drop_table('daily_score_rollup')
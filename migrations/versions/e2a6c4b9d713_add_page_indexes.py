@@ -0,0 +1,66 @@
+"""add page indexes
+
+Revision ID: e2a6c4b9d713
+Revises: b8e1f7c3a905
+Create Date: 2026-10-18 21:02:18.540733
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a6c4b9d713'
+down_revision = 'b8e1f7c3a905'
+branch_labels = None
+depends_on = None
+
+# Keyset pages filter by these columns and order by (id) or (created_at, id)
+INDEXES = [
+    ('ix_user_created_at_id', 'user', ['created_at', 'id']),
+    ('ix_company_is_hidden_id', 'company', ['is_hidden', 'id']),
+    ('ix_company_is_hidden_created_at_id', 'company', ['is_hidden', 'created_at', 'id']),
+    ('ix_role_id_company_id', 'role', ['id_company', 'id']),
+    ('ix_role_id_company_created_at_id', 'role', ['id_company', 'created_at', 'id']),
+    ('ix_role_id_user_id', 'role', ['id_user', 'id']),
+    ('ix_role_id_user_created_at_id', 'role', ['id_user', 'created_at', 'id']),
+    ('ix_invitation_id_company_id', 'invitation', ['id_company', 'id']),
+    ('ix_invitation_id_company_created_at_id', 'invitation', ['id_company', 'created_at', 'id']),
+    ('ix_invitation_id_user_id', 'invitation', ['id_user', 'id']),
+    ('ix_invitation_id_user_created_at_id', 'invitation', ['id_user', 'created_at', 'id']),
+    ('ix_request_id_company_id', 'request', ['id_company', 'id']),
+    ('ix_request_id_company_created_at_id', 'request', ['id_company', 'created_at', 'id']),
+    ('ix_request_id_user_id', 'request', ['id_user', 'id']),
+    ('ix_request_id_user_created_at_id', 'request', ['id_user', 'created_at', 'id']),
+    ('ix_quiz_id_company_id', 'quiz', ['id_company', 'id']),
+    ('ix_quiz_id_company_created_at_id', 'quiz', ['id_company', 'created_at', 'id']),
+    ('ix_notification_id_user_id', 'notification', ['id_user', 'id']),
+    ('ix_notification_id_user_created_at_id', 'notification', ['id_user', 'created_at', 'id']),
+]
+
+# Single column indexes that are now a prefix of a (column, id) index
+REPLACED = [
+    ('ix_role_id_user', 'role', ['id_user']),
+    ('ix_invitation_id_company', 'invitation', ['id_company']),
+    ('ix_invitation_id_user', 'invitation', ['id_user']),
+    ('ix_request_id_company', 'request', ['id_company']),
+    ('ix_request_id_user', 'request', ['id_user']),
+    ('ix_quiz_id_company', 'quiz', ['id_company']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+        for name, table, columns in REPLACED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,33 @@
+"""cascade result details
+
+Revision ID: f3c8a1d6b027
+Revises: e2a6c4b9d713
+Create Date: 2026-10-18 21:40:12.318204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a1d6b027'
+down_revision = 'e2a6c4b9d713'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Results are removed with their quiz by the database, their questions and answers have to follow
+    op.drop_constraint('result_question_id_result_fkey', 'result_question', type_='foreignkey')
+    op.create_foreign_key('result_question_id_result_fkey', 'result_question', 'resul_test',
+                          ['id_result'], ['id'], ondelete='CASCADE')
+    op.drop_constraint('user_answer_id_result_question_fkey', 'user_answer', type_='foreignkey')
+    op.create_foreign_key('user_answer_id_result_question_fkey', 'user_answer', 'result_question',
+                          ['id_result_question'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    op.drop_constraint('user_answer_id_result_question_fkey', 'user_answer', type_='foreignkey')
+    op.create_foreign_key('user_answer_id_result_question_fkey', 'user_answer', 'result_question',
+                          ['id_result_question'], ['id'])
+    op.drop_constraint('result_question_id_result_fkey', 'result_question', type_='foreignkey')
+    op.create_foreign_key('result_question_id_result_fkey', 'result_question', 'resul_test', ['id_result'], ['id'])
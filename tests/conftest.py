@@ -2,6 +2,7 @@ import asyncio
 from typing import AsyncGenerator
 
 import pytest
+from fastapi import Request
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
@@ -9,61 +10,30 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 
 from auth.auth import JWTBearer, jwt_bearer
-from db.database import get_async_session, metadata
+from db.database import get_async_session, metadata, route_session, RoutingAsyncSession, RoutingSession
+from db.redis import init_redis_pool
 from config import global_settings
 from main import app
-from user.models.models import UserModel
-from utils.hashing import Hasher
 
 engine_test = create_async_engine(global_settings.postgresql_test_url, poolclass=NullPool)
-async_session_maker = sessionmaker(engine_test, class_=AsyncSession, expire_on_commit=False)
+async_session_maker = sessionmaker(engine_test, class_=RoutingAsyncSession, sync_session_class=RoutingSession,
+                                  expire_on_commit=False)
 metadata.bind = engine_test
 
+# Keys of the app live for days, tests get a database of their own that is emptied on every run
+global_settings.redis_db = global_settings.redis_db_test
 
-class OverrideJWTBearer(JWTBearer):
-    async def verify_jwt(self, token: str):
-        payload = self.decode_jwt(token)
-
-        if not payload:
-            return None
-
-        async with async_session_maker() as db:
-            user = await UserModel.get_by_fields(db, email=payload['email'])
-
-        if not user:
-            return None
-
-        return user
-
-    async def verify_auth0(self, token: str):
-        payload = self.decode_auth0(token)
-
-        if not payload:
-            return None
-
-        async with async_session_maker() as db:
-            user = await UserModel.get_by_fields(db, email=payload['email'])
 
-            if user:
-                return user
-
-            new_user = UserModel(
-                email=payload['email'],
-                username=payload['email'],
-                hashed_password=Hasher.get_password_hash(payload['email'])
-            )
-
-            await new_user.create(db)
-
-        return new_user
+class OverrideJWTBearer(JWTBearer):
+    session_maker = async_session_maker
 
 
 override_jwt_bearer = OverrideJWTBearer()
 
 
-async def override_get_async_session() -> AsyncGenerator[AsyncSession, None]:
+async def override_get_async_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
-        yield session
+        yield await route_session(session, request)
 
 app.dependency_overrides[get_async_session] = override_get_async_session
 app.dependency_overrides[jwt_bearer] = override_jwt_bearer
@@ -78,6 +48,12 @@ async def prepare_database():
         await conn.run_sync(metadata.drop_all)
 
 
+@pytest.fixture(autouse=True, scope='session')
+async def prepare_redis():
+    redis = await init_redis_pool()
+    await redis.flushdb()
+
+
 @pytest.fixture(scope='session')
 def event_loop(request):
     loop = asyncio.get_event_loop_policy().new_event_loop()
@@ -12,3 +12,11 @@ async def test_health(ac: AsyncClient):
     response = await ac.get("/")
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == data
+
+
+async def test_metrics(ac: AsyncClient):
+    response = await ac.get("/metrics/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['database']['checked_out'] == 0
+    assert response.json()['database']['timeouts'] == 0
@@ -1,9 +1,17 @@
+import asyncio
+import threading
+
+import orjson
 from httpx import AsyncClient
 
 import pytest
-from fastapi import status
+from fastapi import HTTPException, status
 
-from utils.hashing import Hasher
+from auth.claims import verify_stats
+from auth.principal import principal_cache, principal_key
+from db.redis import redis_client
+from user.models.models import UserModel
+from utils.hashing import Hasher, HashingPool
 
 
 async def test_create(ac: AsyncClient):
@@ -186,13 +194,71 @@ async def test_put_bad_id(ac: AsyncClient, user_token: dict):
     assert response_put.json()['detail'] == "This user cannot change the data"
 
 
+async def test_verified_claims_cached(ac: AsyncClient, user_token: dict):
+    verified = verify_stats['jwt'].verified
+    cache_hits = verify_stats['jwt'].cache_hits
+
+    await ac.get("/auth/me/", headers=user_token)
+    await ac.get("/auth/me/", headers=user_token)
+
+    assert verify_stats['jwt'].verified == verified + 1
+    assert verify_stats['jwt'].cache_hits == cache_hits + 1
+
+
+@pytest.mark.parametrize('user_token', ('5'), indirect=True)
+async def test_principal_cache(ac: AsyncClient, user_token: dict):
+    await principal_cache.invalidate('test5@gmail.com')
+
+    misses = principal_cache.misses
+
+    await ac.get("/auth/me/", headers=user_token)
+    response = await ac.get("/auth/me/", headers=user_token)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['email'] == 'test5@gmail.com'
+    assert principal_cache.misses == misses + 1
+
+
+@pytest.mark.parametrize('user_token', ('5'), indirect=True)
+async def test_principal_cache_has_no_password(ac: AsyncClient, user_token: dict):
+    await principal_cache.invalidate('test5@gmail.com')
+
+    response_miss = await ac.get("/auth/me/", headers=user_token)
+    response_hit = await ac.get("/auth/me/", headers=user_token)
+
+    async with redis_client() as redis:
+        cached = orjson.loads(await redis.get(principal_key('test5@gmail.com')))
+
+    assert 'hashed_password' not in cached
+    assert 'hashed_password' not in principal_cache.local['test5@gmail.com'][1]
+    assert response_miss.json()['hashed_password'] is None
+    assert response_hit.json()['hashed_password'] is None
+
+
+@pytest.mark.parametrize('user_token', ('5'), indirect=True)
+async def test_principal_cache_invalidated_on_put(ac: AsyncClient, user_token: dict):
+    await ac.get("/auth/me/", headers=user_token)
+
+    await ac.put("/user/5/", json={
+        "username": "renamed",
+        "password": "test5",
+        "password_confirm": "test5",
+    }, headers=user_token)
+
+    response = await ac.get("/auth/me/", headers=user_token)
+
+    assert response.json()['username'] == 'renamed'
+
+
 @pytest.mark.parametrize('user_token', ('5'), indirect=True)
 async def test_delete(ac: AsyncClient, user_token: dict):
 
     response = await ac.delete("/user/5/", headers=user_token)
+    response_me = await ac.get("/auth/me/", headers=user_token)
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json()["detail"] == "Success delete user"
+    assert response_me.status_code == status.HTTP_403_FORBIDDEN
 
 
 async def test_delete_bad_id(ac: AsyncClient, user_token: dict):
@@ -200,3 +266,74 @@ async def test_delete_bad_id(ac: AsyncClient, user_token: dict):
 
     assert response.status_code == 400
     assert response.json()["detail"] == "This user cannot delete"
+
+
+async def test_get_cursor_pagination(ac: AsyncClient, user_token: dict):
+    response_first = await ac.get("/user/", params={"limit": 2}, headers=user_token)
+
+    response_second = await ac.get("/user/", params={
+        "limit": 2,
+        "cursor": response_first.headers['X-Next-Cursor']
+    }, headers=user_token)
+
+    assert response_first.status_code == status.HTTP_200_OK
+    assert [user['id'] for user in response_first.json()] == [1, 2]
+    assert response_second.status_code == status.HTTP_200_OK
+    assert [user['id'] for user in response_second.json()] == [3, 4]
+    assert 'X-Next-Cursor' not in response_second.headers
+
+
+async def test_get_cursor_pagination_by_created_at(ac: AsyncClient, user_token: dict):
+    response_first = await ac.get("/user/", params={"limit": 3, "order_by": "created_at"}, headers=user_token)
+
+    response_second = await ac.get("/user/", params={
+        "limit": 3,
+        "order_by": "created_at",
+        "cursor": response_first.headers['X-Next-Cursor']
+    }, headers=user_token)
+
+    assert response_first.status_code == status.HTTP_200_OK
+    assert [user['id'] for user in response_first.json()] == [1, 2, 3]
+    assert [user['id'] for user in response_second.json()] == [4]
+    assert 'X-Next-Cursor' not in response_second.headers
+
+
+async def test_get_bad_cursor(ac: AsyncClient, user_token: dict):
+    response = await ac.get("/user/", params={"cursor": "bad_cursor"}, headers=user_token)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()['detail'] == 'Invalid cursor'
+
+
+async def test_get_page_invalid_limit(ac: AsyncClient, user_token: dict):
+    for limit in (0, -1, 1001):
+        response = await ac.get("/user/", params={"limit": limit}, headers=user_token)
+        response_notifications = await ac.get("/user/1/notifications/", params={"limit": limit}, headers=user_token)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response_notifications.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_get_page_zero_limit():
+    with pytest.raises(HTTPException) as error:
+        await UserModel.get_page(None, limit=0)
+
+    assert error.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_hashing_pool_rejects_when_full():
+    hashing_pool = HashingPool(workers=1, max_queue=0)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(hashing_pool.run(release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as error:
+        await hashing_pool.run(Hasher.get_password_hash, 'password')
+
+    release.set()
+    await running
+
+    assert error.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert hashing_pool.stats()['rejected'] == 1
+    assert hashing_pool.stats()['completed'] == 1
@@ -2,6 +2,12 @@ from httpx import AsyncClient
 
 import pytest
 from fastapi import status
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from config import global_settings
+from db import database
 
 
 @pytest.mark.parametrize('user_token', ('3'), indirect=True)
@@ -109,3 +115,54 @@ async def test_remove_admin(ac: AsyncClient, user_token: dict):
     assert response_1.status_code == status.HTTP_200_OK
     assert response_2.status_code == status.HTTP_200_OK
     assert len(response_2.json()) == 0
+
+
+async def test_admin_set_reads_own_write(ac: AsyncClient, user_token: dict, monkeypatch):
+    # The replica is the test database too, only the statements it runs are recorded
+    replica = create_async_engine(global_settings.postgresql_test_url, poolclass=NullPool)
+    monkeypatch.setattr(database, 'replica_engines', [replica])
+
+    executed = []
+    event.listen(replica.sync_engine, 'before_cursor_execute', lambda *args: executed.append(args[2]))
+
+    # Caches the principal, so authentication does not read the user again
+    await ac.get("/auth/me/", headers=user_token)
+    executed.clear()
+
+    response_set = await ac.get("/company/1/admin/2/set/", headers=user_token)
+    response_admins = await ac.get("/company/1/admins/", headers=user_token)
+    response_remove = await ac.get("/company/1/admin/2/remove/", headers=user_token)
+
+    await replica.dispose()
+
+    assert response_set.status_code == status.HTTP_200_OK
+    assert [admin['id'] for admin in response_admins.json()] == [2]
+    assert response_remove.status_code == status.HTTP_200_OK
+    assert executed == []
+
+
+async def test_company_users_pages(ac: AsyncClient, user_token: dict):
+    response_all = await ac.get("/company/1/users/", headers=user_token)
+    response_first = await ac.get("/company/1/users/", params={'limit': 1}, headers=user_token)
+
+    response_rest = await ac.get("/company/1/users/", params={
+        'cursor': response_first.headers['X-Next-Cursor']
+    }, headers=user_token)
+
+    assert response_all.status_code == status.HTTP_200_OK
+    assert [user['id'] for user in response_first.json()] == [1]
+    assert response_first.json() + response_rest.json() == response_all.json()
+    assert 'X-Next-Cursor' not in response_rest.headers
+
+
+async def test_user_companies_pages(ac: AsyncClient, user_token: dict):
+    response_all = await ac.get("/user/1/companies/", headers=user_token)
+    response_first = await ac.get("/user/1/companies/", params={'limit': 1}, headers=user_token)
+
+    response_rest = await ac.get("/user/1/companies/", params={
+        'cursor': response_first.headers['X-Next-Cursor']
+    }, headers=user_token)
+
+    assert response_all.status_code == status.HTTP_200_OK
+    assert len(response_all.json()) > 1
+    assert response_first.json() + response_rest.json() == response_all.json()
@@ -114,6 +114,50 @@ async def test_update_question(ac: AsyncClient, user_token: dict):
     assert response_get.status_code == status.HTTP_200_OK
 
 
+async def test_update_question_keeps_unchanged_answers(ac: AsyncClient, user_token: dict):
+    response_before = await ac.get("/quiz/1/", headers=user_token)
+    answers_before = response_before.json()['questions'][2]['answers']
+
+    response_grow = await ac.put("/question/3/", json={
+        "question": "update",
+        "answers": [
+            {
+                "answer": "update",
+                "is_correct": False
+            },
+            {
+                "answer": "changed",
+                "is_correct": True
+            },
+            {
+                "answer": "added",
+                "is_correct": False
+            },
+        ]}, headers=user_token)
+
+    response_shrink = await ac.put("/question/3/", json={
+        "question": "update",
+        "answers": [
+            {
+                "answer": "update",
+                "is_correct": False
+            },
+            {
+                "answer": "changed",
+                "is_correct": True
+            },
+        ]}, headers=user_token)
+
+    answers_grow = response_grow.json()['answers']
+    answers_shrink = response_shrink.json()['answers']
+
+    assert response_grow.status_code == status.HTTP_201_CREATED
+    assert [answer['answer'] for answer in answers_grow] == ["update", "changed", "added"]
+    assert [answer['id'] for answer in answers_grow[:2]] == [answer['id'] for answer in answers_before]
+    assert response_shrink.status_code == status.HTTP_201_CREATED
+    assert [answer['id'] for answer in answers_shrink] == [answer['id'] for answer in answers_before]
+
+
 async def test_delete_question(ac: AsyncClient, user_token: dict):
     response = await ac.delete("/question/3/", headers=user_token)
 
@@ -2,6 +2,9 @@ from httpx import AsyncClient
 
 from fastapi import status
 
+from analytic.cache import version_key
+from db.redis import init_redis_pool
+
 answers = {
     "answers": [
         [0, 1], [1, 0]
@@ -10,6 +13,9 @@ answers = {
 
 
 async def test_pass_qiuz(ac: AsyncClient, user_token: dict):
+    redis = await init_redis_pool()
+    versions = [int(await redis.get(version_key(*scope)) or 0) for scope in (('company', 1), ('user', 1))]
+
     response_1 = await ac.post("/quiz/2/pass_test/", json={
         "answers": [
             [0], [0, 1]
@@ -37,6 +43,9 @@ async def test_pass_qiuz(ac: AsyncClient, user_token: dict):
     assert response_3.status_code == status.HTTP_201_CREATED
     assert response_3.json()["count_correct_answers"] == 1
 
+    assert int(await redis.get(version_key('company', 1))) == versions[0] + 2
+    assert int(await redis.get(version_key('user', 1))) == versions[1] + 3
+
 
 async def test_company_rating(ac: AsyncClient, user_token: dict):
     response = await ac.get("/user/1/company_rating/", headers=user_token)
@@ -1,7 +1,15 @@
+import json
+import time
+
 from httpx import AsyncClient
 
 from fastapi import status
 
+from db.codec import encode_result, decode_result, COMPACT, COMPACT_ZLIB
+from db.redis import init_redis_pool, breaker, CircuitBreaker
+from db import redis_actions
+from db.redis_actions import index_key, index_member, result_key
+
 
 async def test_user_get_results(ac: AsyncClient, user_token: dict):
     response = await ac.get("/user/1/test_results/", headers=user_token)
@@ -17,6 +25,12 @@ async def test_user_get_result_by_id(ac: AsyncClient, user_token: dict):
     assert len(response.json()['questions']) == 2
 
 
+async def test_user_get_result_by_id_csv(ac: AsyncClient, user_token: dict):
+    response = await ac.get("/user/1/test_result/1/csv/", headers=user_token)
+
+    assert response.status_code == status.HTTP_200_OK
+
+
 async def test_company_get_results(ac: AsyncClient, user_token: dict):
     response = await ac.get("/company/1/results/", headers=user_token)
 
@@ -24,6 +38,30 @@ async def test_company_get_results(ac: AsyncClient, user_token: dict):
     assert len(response.json()) == 2
 
 
+async def test_company_get_results_page(ac: AsyncClient, user_token: dict):
+    response = await ac.get("/company/1/results/", headers=user_token)
+    results = response.json()
+
+    assert [result['id'] for result in results] == sorted((result['id'] for result in results), reverse=True)
+
+    response = await ac.get("/company/1/results/", headers=user_token, params={'skip': 1, 'limit': 1})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == results[1:2]
+
+
+async def test_company_get_results_dates(ac: AsyncClient, user_token: dict):
+    response = await ac.get("/company/1/results/", headers=user_token, params={'from': '2000-01-01T00:00:00'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2
+
+    response = await ac.get("/company/1/results/", headers=user_token, params={'to': '2000-01-01T00:00:00'})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()['detail'] == 'Results not found'
+
+
 async def test_company_get_results_user(ac: AsyncClient, user_token: dict):
     response = await ac.get("/company/1/results_user/1/", headers=user_token)
 
@@ -49,4 +87,103 @@ async def test_company_get_results_quiz_bad(ac: AsyncClient, user_token: dict):
     response = await ac.get("/company/1/results_quiz/3/", headers=user_token)
 
     assert response.status_code == status.HTTP_400_BAD_REQUEST
-    assert response.json()['detail'] == 'Results not found'
\ No newline at end of file
+    assert response.json()['detail'] == 'Results not found'
+
+async def test_results_read_through(ac: AsyncClient, user_token: dict):
+    redis = await init_redis_pool()
+    await redis.delete(result_key(1), index_key(id_company=1))
+
+    response = await ac.get("/company/1/results/", headers=user_token)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2
+    assert await redis.exists(result_key(1))
+    assert await redis.zscore(index_key(id_company=1), index_member(1))
+
+
+async def test_result_index_ties_by_id():
+    redis = await init_redis_pool()
+    await redis.delete(index_key(id_user=900))
+
+    await redis_actions.build_index({8: 100.0, 9: 200.0, 10: 200.0, 11: 300.0}, id_user=900)
+
+    assert await redis_actions.get_result_ids(id_user=900) == [11, 10, 9, 8]
+    assert await redis_actions.get_result_ids(1, 1, id_user=900) == [10]
+    assert await redis_actions.get_result_ids(2, 1, id_user=900) == [9]
+
+    await redis_actions.remove_from_index([10], id_user=900)
+
+    assert await redis_actions.get_result_ids(id_user=900) == [11, 9, 8]
+
+    await redis.delete(index_key(id_user=900))
+
+
+async def test_results_fallback_to_postgres(ac: AsyncClient, user_token: dict, monkeypatch):
+    monkeypatch.setattr(breaker, 'opened_at', time.monotonic())
+
+    response = await ac.get("/company/1/results/", headers=user_token)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2
+
+    response = await ac.get("/company/1/results/", headers=user_token, params={'skip': 1, 'limit': 1})
+
+    assert [result['id'] for result in response.json()] == [1]
+
+    response = await ac.get("/user/1/test_result/1/", headers=user_token)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()['questions']) == 2
+
+
+def test_circuit_breaker():
+    circuit_breaker = CircuitBreaker(threshold=2, reset_timeout=30)
+
+    circuit_breaker.failure()
+    assert not circuit_breaker.is_open
+
+    circuit_breaker.failure()
+    assert circuit_breaker.is_open
+
+    circuit_breaker.opened_at -= 30
+    assert not circuit_breaker.is_open
+
+    circuit_breaker.success()
+    assert circuit_breaker.failures == 0
+
+
+def make_result_data(count_questions: int) -> dict:
+    return {
+        'id': 1,
+        'id_user': 1,
+        'id_company': 1,
+        'id_quiz': 1,
+        'created_at': '2023-07-20T10:00:00+00:00',
+        'questions': [
+            {'question': f"question {i}", 'answer_is_correct': i % 2 == 0, 'user_answers': ['answer 1', 'answer 2']}
+            for i in range(count_questions)
+        ]
+    }
+
+
+def test_result_codec():
+    result = make_result_data(2)
+    payload = encode_result(result)
+
+    assert payload[:1] == COMPACT
+    assert len(payload) < len(json.dumps(result))
+    assert decode_result(payload) == result
+
+
+def test_result_codec_compressed():
+    result = make_result_data(50)
+    payload = encode_result(result)
+
+    assert payload[:1] == COMPACT_ZLIB
+    assert decode_result(payload) == result
+
+
+def test_result_codec_reads_json():
+    result = make_result_data(2)
+
+    assert decode_result(json.dumps(result).encode()) == result
@@ -1,7 +1,63 @@
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone, date
+
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
 
 from fastapi import status
 
+from analytic.cache import analytic_cache
+from analytic.models.models import DailyScoreRollupModel, LastPassModel
+from config import global_settings
+from db.database import RoutingSession
+from db import redis_actions
+from db.redis import init_redis_pool, breaker
+from db.redis_actions import index_key, result_key
+from quiz.models.models import ResultTestModel
+from utils.analytic import avarage_quiz_score_by_time, running_score_by_day
+from utils.score_engine import ScoreFrame
+
+ResultRow = namedtuple('ResultRow', ['count_correct_answers', 'count_questions', 'created_at'])
+ScoreRow = namedtuple('ScoreRow', ['created_at', 'id_user', 'id_quiz', 'count_correct_answers', 'count_questions'])
+
+
+def reference_avarage_quiz_score_by_time(data):
+    # The previous O(days x results) implementation, kept to check the running-sum one against
+    data_by_date = {}
+    for item in data:
+        created_at_date = item.created_at.date()
+        if created_at_date not in data_by_date:
+            data_by_date[created_at_date] = []
+        data_by_date[created_at_date].append(item)
+
+    result, history = [], []
+    for date, data_list in data_by_date.items():
+        history.extend(data_list)
+        total_correct_answers = sum(item.count_correct_answers for item in history)
+        total_questions = sum(item.count_questions for item in history)
+        result.append({'date': date, 'rating': total_correct_answers / total_questions})
+
+    return result
+
+
+def make_results(count: int, days: int, seed: int) -> list:
+    generator = random.Random(seed)
+    start = datetime(2023, 1, 1)
+
+    results = []
+    for _ in range(count):
+        count_questions = generator.randint(1, 10)
+        results.append(ResultRow(
+            count_correct_answers=generator.randint(0, count_questions),
+            count_questions=count_questions,
+            created_at=start + timedelta(days=generator.randrange(days), seconds=generator.randrange(86400)),
+        ))
+
+    return results
+
 
 async def test_user_global_rating_analytic(ac: AsyncClient, user_token: dict):
     response = await ac.get("/user/1/global_rating_analytic/", headers=user_token)
@@ -55,3 +111,263 @@ async def test_company_users_last_pass_quizzes(ac: AsyncClient, user_token: dict
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) == 1
     assert response.json()[0]['id_user'] == 1
+
+
+async def test_daily_rollup_matches_results():
+    engine = create_async_engine(global_settings.postgresql_test_url, poolclass=NullPool)
+
+    async with AsyncSession(engine, sync_session_class=RoutingSession) as db:
+        for fields in ({'id_company': 1}, {'id_company': 1, 'id_user': 1}, {'id_user': 1, 'id_quiz': 2}):
+            rows = await ResultTestModel.get_columns(
+                db, ('created_at', 'count_correct_answers', 'count_questions'), **fields
+            )
+            totals = await DailyScoreRollupModel.get_totals_by_day(db, **fields)
+
+            expected = avarage_quiz_score_by_time(rows)
+
+            assert totals
+            assert list(running_score_by_day(totals)) == list(expected)
+
+    await engine.dispose()
+
+
+async def test_company_user_analytic_without_results(ac: AsyncClient, user_token: dict):
+    response = await ac.get("/company/1/user_analytic/5/", headers=user_token)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_get_columns_returns_named_rows():
+    engine = create_async_engine(global_settings.postgresql_test_url, poolclass=NullPool)
+
+    async with AsyncSession(engine, sync_session_class=RoutingSession) as db:
+        rows = await ResultTestModel.get_columns(db, ('id_quiz', 'created_at'), id_user=1)
+
+        assert rows
+        assert all(row._fields == ('id_quiz', 'created_at') for row in rows)
+        assert len(db.identity_map) == 0
+
+    await engine.dispose()
+
+
+async def test_last_pass_matches_results():
+    engine = create_async_engine(global_settings.postgresql_test_url, poolclass=NullPool)
+
+    async with AsyncSession(engine, sync_session_class=RoutingSession) as db:
+        rows = await ResultTestModel.get_columns(
+            db, ('id_user', 'id_quiz', 'id_company', 'created_at', 'count_correct_answers'), id_user=1
+        )
+
+        latest = {}
+        for row in rows:
+            key = (row.id_user, row.id_quiz, row.id_company)
+            if key not in latest or row.created_at >= latest[key].created_at:
+                latest[key] = row
+
+        last_passes = await LastPassModel.get_by_fields(db, return_single=False, id_user=1)
+
+        assert {
+            (item.id_user, item.id_quiz, item.id_company): (item.passed_at, item.count_correct_answers)
+            for item in last_passes
+        } == {key: (row.created_at, row.count_correct_answers) for key, row in latest.items()}
+
+    await engine.dispose()
+
+
+def test_score_by_time_matches_reference():
+    for seed in range(5):
+        results = sorted(make_results(500, 30, seed), key=lambda item: item.created_at)
+
+        assert list(avarage_quiz_score_by_time(results)) == reference_avarage_quiz_score_by_time(results)
+
+
+def test_score_by_time_unsorted_input():
+    results = make_results(500, 30, 0)
+    expected = reference_avarage_quiz_score_by_time(sorted(results, key=lambda item: item.created_at))
+
+    random.Random(1).shuffle(results)
+
+    assert list(avarage_quiz_score_by_time(results)) == expected
+
+
+def test_score_by_time_empty():
+    assert list(avarage_quiz_score_by_time([])) == []
+
+
+def make_score_rows(count: int, days: int, seed: int) -> list:
+    generator = random.Random(seed)
+
+    return [
+        ScoreRow(
+            result.created_at.replace(tzinfo=timezone.utc),
+            generator.randint(1, 50),
+            generator.randint(1, 20),
+            result.count_correct_answers,
+            result.count_questions
+        )
+        for result in make_results(count, days, seed)
+    ]
+
+
+def reference_group_by(rows, name: str) -> list:
+    totals = {}
+    for row in rows:
+        item = totals.setdefault(getattr(row, name), [0, 0, 0])
+        item[0] += row.count_correct_answers
+        item[1] += row.count_questions
+        item[2] += 1
+
+    return [
+        {name: key, 'rating': correct / questions, 'results': results}
+        for key, (correct, questions, results) in sorted(totals.items())
+    ]
+
+
+def test_score_frame_by_time_matches_running_sum():
+    rows = make_score_rows(2000, 60, 0)
+
+    assert ScoreFrame.from_rows(rows).by_time() == list(avarage_quiz_score_by_time(rows))
+
+
+def test_score_frame_buckets():
+    rows = [
+        ScoreRow(datetime(2023, 1, day, 12, tzinfo=timezone.utc), 1, 1, day % 3, 2)
+        for day in (1, 2, 9, 31)
+    ] + [ScoreRow(datetime(2023, 2, 1, tzinfo=timezone.utc), 1, 1, 2, 2)]
+    frame = ScoreFrame.from_rows(rows)
+
+    # 2023-01-01 is a Sunday
+    assert [item['date'] for item in frame.by_time('week')] == [
+        date(2022, 12, 26), date(2023, 1, 2), date(2023, 1, 9), date(2023, 1, 30)
+    ]
+    assert frame.by_time('month', cumulative=False) == [
+        {'date': date(2023, 1, 1), 'rating': (1 + 2 + 0 + 1) / 8},
+        {'date': date(2023, 2, 1), 'rating': 1.0},
+    ]
+
+
+def test_score_frame_aggregates():
+    rows = make_score_rows(2000, 60, 1)
+    frame = ScoreFrame.from_rows(rows)
+
+    assert frame.by_user() == reference_group_by(rows, 'id_user')
+    assert frame.by_quiz() == reference_group_by(rows, 'id_quiz')
+
+    scores = sorted(row.count_correct_answers / row.count_questions for row in rows)
+    assert frame.percentiles((0, 100)) == {0: scores[0], 100: scores[-1]}
+
+    histogram = frame.histogram(4)
+    assert histogram['edges'] == [0.0, 0.25, 0.5, 0.75, 1.0]
+    assert sum(histogram['counts']) == len(rows)
+    assert histogram['counts'][-1] == sum(score >= 0.75 for score in scores)
+
+
+async def test_company_score_summary(ac: AsyncClient, user_token: dict):
+    response = await ac.get("/company/1/score_summary/", headers=user_token)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['by_time'][-1]['rating'] == 0.75
+    assert response.json()['users'] == [{'id_user': 1, 'rating': 0.75, 'results': 2}]
+    assert sum(response.json()['histogram']['counts']) == 2
+
+
+async def test_company_score_summary_unknown_bucket(ac: AsyncClient, user_token: dict):
+    response = await ac.get("/company/1/score_summary/?bucket=year", headers=user_token)
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_analytic_cache_hit_and_bump(ac: AsyncClient, user_token: dict):
+    first = await ac.get("/company/1/users_analytic/", headers=user_token)
+    hits, misses = analytic_cache.hits, analytic_cache.misses
+
+    second = await ac.get("/company/1/users_analytic/", headers=user_token)
+
+    assert second.json() == first.json()
+    assert (analytic_cache.hits, analytic_cache.misses) == (hits + 1, misses)
+
+    await analytic_cache.bump(id_company=1)
+    third = await ac.get("/company/1/users_analytic/", headers=user_token)
+
+    assert third.json() == first.json()
+    assert (analytic_cache.hits, analytic_cache.misses) == (hits + 1, misses + 1)
+
+
+async def test_analytic_cache_keyed_by_args(ac: AsyncClient, user_token: dict):
+    day = await ac.get("/company/1/score_summary/", headers=user_token)
+    month = await ac.get("/company/1/score_summary/?bucket=month&bins=4", headers=user_token)
+
+    assert len(day.json()['histogram']['counts']) == 10
+    assert len(month.json()['histogram']['counts']) == 4
+    assert month.json()['by_time'][0]['date'].endswith('-01')
+    assert day.json()['percentiles'] == month.json()['percentiles']
+
+
+async def test_analytic_cache_without_redis(ac: AsyncClient, user_token: dict, monkeypatch):
+    monkeypatch.setattr(breaker, 'opened_at', time.monotonic())
+    hits, misses = analytic_cache.hits, analytic_cache.misses
+
+    response = await ac.get("/user/1/quiz_analytic/2/", headers=user_token)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]['rating'] == 0.75
+    assert (analytic_cache.hits, analytic_cache.misses) == (hits, misses)
+
+
+async def test_company_question_stats(ac: AsyncClient, user_token: dict):
+    response = await ac.get("/company/1/question_stats/", params={'quiz_id': 2}, headers=user_token)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [(item['attempts'], item['correct'], item['rating']) for item in response.json()] == [(2, 2, 1.0), (2, 1, 0.5)]
+    assert [[answer['selections'] for answer in item['answers']] for item in response.json()] == [[2, 0], [2, 1]]
+
+
+async def test_question_stats_reset_on_edit(ac: AsyncClient, user_token: dict):
+    stats = (await ac.get("/company/1/question_stats/", params={'quiz_id': 2}, headers=user_token)).json()
+    question = stats[0]
+
+    data = {
+        'question': question['question'],
+        'answers': [{'answer': answer['answer'], 'is_correct': answer['is_correct']} for answer in question['answers']],
+    }
+
+    # Saving the question unchanged keeps its counters
+    await ac.put(f"/question/{question['id_question']}/", json=data, headers=user_token)
+    response = await ac.get("/company/1/question_stats/", params={'quiz_id': 2}, headers=user_token)
+
+    assert response.json() == stats
+
+    data['answers'][1]['is_correct'] = True
+    await ac.put(f"/question/{question['id_question']}/", json=data, headers=user_token)
+    response = await ac.get("/company/1/question_stats/", params={'quiz_id': 2}, headers=user_token)
+
+    assert response.json() == stats[1:]
+
+
+async def test_company_question_stats_unknown_quiz(ac: AsyncClient, user_token: dict):
+    response = await ac.get("/company/1/question_stats/", params={'quiz_id': 1000}, headers=user_token)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_delete_quiz_drops_cached_results(ac: AsyncClient, user_token: dict):
+    engine = create_async_engine(global_settings.postgresql_test_url, poolclass=NullPool)
+
+    async with AsyncSession(engine, sync_session_class=RoutingSession) as db:
+        ids = [row.id for row in await ResultTestModel.get_columns(db, ('id',), id_quiz=3)]
+
+    await engine.dispose()
+
+    # Caches the payloads and builds the user index
+    await ac.get("/user/1/test_results/", headers=user_token)
+
+    response = await ac.delete("/quiz/3/", headers=user_token)
+
+    redis = await init_redis_pool()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert ids
+    assert not await redis.exists(*[result_key(result_id) for result_id in ids])
+    assert not set(ids) & set(await redis_actions.get_result_ids(id_user=1))
+    assert await redis_actions.get_result_ids(id_quiz=3) == []
+    assert await redis.zcard(index_key(id_user=1, id_company=3)) <= 1
@@ -0,0 +1,165 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from auth import auth
+from auth.auth import JWTBearer
+from auth.claims import ClaimsCache
+from auth.jwks import JWKSCache
+from config import global_settings
+
+PRIVATE_KEYS = {kid: rsa.generate_private_key(public_exponent=65537, key_size=2048) for kid in ('key-1', 'key-2')}
+
+
+def public_jwk(kid: str) -> dict:
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(PRIVATE_KEYS[kid].public_key()))
+
+    return {**jwk, 'kid': kid, 'use': 'sig', 'alg': 'RS256'}
+
+
+class JWKSHandler(BaseHTTPRequestHandler):
+    published = ['key-1']
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+
+        body = json.dumps({'keys': [public_jwk(kid) for kid in self.published]}).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def jwks_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), JWKSHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_port}/.well-known/jwks.json"
+
+    server.shutdown()
+
+
+@pytest.fixture
+def cache(jwks_url):
+    JWKSHandler.published = ['key-1']
+    JWKSHandler.requests = 0
+
+    return JWKSCache(jwks_url, ttl=600, negative_ttl=60, min_refresh_interval=0, timeout=5)
+
+
+def sign(kid: str, **claims) -> str:
+    payload = {
+        'email': 'auth0@example.com',
+        'aud': global_settings.auth0_api_audience,
+        'iss': global_settings.auth0_issuer,
+        'exp': int(time.time()) + 60,
+        **claims
+    }
+
+    return jwt.encode(payload, PRIVATE_KEYS[kid], algorithm='RS256', headers={'kid': kid})
+
+
+async def test_keys_are_cached(cache):
+    assert (await cache.get_key('key-1')).key_id == 'key-1'
+    assert (await cache.get_key('key-1')).key_id == 'key-1'
+
+    assert JWKSHandler.requests == 1
+
+
+async def test_unknown_kid_refreshes(cache):
+    await cache.get_key('key-1')
+
+    JWKSHandler.published = ['key-1', 'key-2']
+
+    assert (await cache.get_key('key-2')).key_id == 'key-2'
+    assert JWKSHandler.requests == 2
+
+
+async def test_unknown_kid_negative_cache(cache):
+    await cache.get_key('key-1')
+
+    assert await cache.get_key('key-3') is None
+    assert await cache.get_key('key-3') is None
+
+    assert JWKSHandler.requests == 2
+
+
+async def test_stale_keys_refresh_in_background(cache):
+    await cache.get_key('key-1')
+
+    cache.fetched_at -= cache.ttl
+
+    assert (await cache.get_key('key-1')).key_id == 'key-1'
+
+    await cache.refresh_task
+
+    assert JWKSHandler.requests == 2
+    assert cache.age() < cache.ttl
+
+
+async def test_refresh_failure_keeps_keys(cache):
+    await cache.get_key('key-1')
+
+    cache.url = 'http://127.0.0.1:1/'
+    cache.fetched_at -= cache.ttl
+
+    assert (await cache.get_key('key-1')).key_id == 'key-1'
+
+    await cache.refresh_task
+
+    assert (await cache.get_key('key-1')).key_id == 'key-1'
+
+
+async def test_decode_auth0(cache, monkeypatch):
+    monkeypatch.setattr(auth, 'jwks_cache', cache)
+
+    payload = await JWTBearer.decode_auth0(sign('key-1'))
+
+    assert payload['email'] == 'auth0@example.com'
+
+
+async def test_decode_auth0_bad_tokens(cache, monkeypatch):
+    monkeypatch.setattr(auth, 'jwks_cache', cache)
+
+    assert await JWTBearer.decode_auth0(sign('key-1', exp=int(time.time()) - 60)) is None
+    assert await JWTBearer.decode_auth0(sign('key-1', aud='other')) is None
+    assert await JWTBearer.decode_auth0(sign('key-2')) is None
+    assert await JWTBearer.decode_auth0(JWTBearer.sign_jwt('user@example.com').access_token) is None
+
+    assert JWKSHandler.requests == 2
+
+
+def test_token_path():
+    assert JWTBearer.token_path(JWTBearer.sign_jwt('user@example.com').access_token) == 'jwt'
+    assert JWTBearer.token_path(sign('key-1')) == 'auth0'
+    assert JWTBearer.token_path(sign('key-1', iss='https://other.example/')) is None
+    assert JWTBearer.token_path('bad_token') is None
+
+
+def test_claims_cache():
+    claims_cache = ClaimsCache(size=2)
+
+    claims_cache.put('token-1', 'jwt', {'email': 'user1@example.com'}, time.time() + 60)
+    claims_cache.put('token-2', 'jwt', {'email': 'user2@example.com'}, time.time() - 1)
+
+    assert claims_cache.get('token-1') == ('jwt', {'email': 'user1@example.com'})
+    assert claims_cache.get('token-2') is None
+
+    claims_cache.put('token-3', 'auth0', {'email': 'user3@example.com'}, time.time() + 60)
+    claims_cache.put('token-4', 'auth0', {'email': 'user4@example.com'}, time.time() + 60)
+
+    assert claims_cache.get('token-1') is None
+    assert claims_cache.get('token-4') == ('auth0', {'email': 'user4@example.com'})
@@ -0,0 +1,187 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from analytic.models.models import AverageScoreCompanyModel, DailyScoreRollupModel, LastPassModel, QuestionStatModel, AnswerStatModel
+from company.models.models import CompanyModel, RoleModel, InvitationModel, RequestModel
+from config import global_settings
+from db.database import metadata
+from db.pagination import ORDER_KEYS, encode_cursor
+from quiz.models.models import ResultTestModel, QuizModel, QuestionModel, AnswerModel, ResultQuestionModel, UserAnswerModel
+from user.models.models import UserModel, NotificationModel, StatusEnum
+
+# The fixture is seeded into its own schema inside a transaction that is rolled back,
+# so it doesn't touch the tables or the id sequences the other test modules rely on.
+PLAN_SCHEMA = 'query_plan_check'
+
+SEED = [
+    """INSERT INTO "user" (email, username, hashed_password, is_active, is_superuser, is_verified, created_at, updated_at)
+       SELECT 'user' || i || '@example.com', 'user' || i, '-', true, false, false, now(), now()
+       FROM generate_series(1, 20000) AS i""",
+    """INSERT INTO company (name, description, is_hidden, created_at, updated_at)
+       SELECT 'company' || i, '-', false, now(), now() FROM generate_series(1, 200) AS i""",
+    """INSERT INTO quiz (name, description, count_day, id_company, created_at, updated_at)
+       SELECT 'quiz' || i, '-', 1, 1 + i % 200, now(), now() FROM generate_series(1, 2000) AS i""",
+    """INSERT INTO question (question, id_quiz, created_at, updated_at)
+       SELECT 'question' || i, 1 + i % 2000, now(), now() FROM generate_series(1, 20000) AS i""",
+    """INSERT INTO answer (answer, id_question, is_correct, created_at, updated_at)
+       SELECT 'answer' || i, 1 + i % 20000, i % 4 = 0, now(), now() FROM generate_series(1, 80000) AS i""",
+    """INSERT INTO role (id_company, id_user, role, created_at, updated_at)
+       SELECT 1 + i % 200, 1 + i % 20000, 'MEMBER', now(), now() FROM generate_series(1, 40000) AS i""",
+    """INSERT INTO invitation (id_company, id_user, created_at, updated_at)
+       SELECT 1 + i % 200, 1 + i % 20000, now(), now() FROM generate_series(1, 20000) AS i""",
+    """INSERT INTO request (id_company, id_user, created_at, updated_at)
+       SELECT 1 + i % 200, 1 + i % 20000, now(), now() FROM generate_series(1, 20000) AS i""",
+    """INSERT INTO notification (id_user, text, status, created_at, updated_at)
+       SELECT 1 + i % 20000, '-', CASE WHEN i % 2 = 0 THEN 'READ' ELSE 'NEW' END::statusenum, now(), now()
+       FROM generate_series(1, 100000) AS i""",
+    """INSERT INTO resul_test (count_correct_answers, count_questions, id_user, id_company, id_quiz, created_at, updated_at)
+       SELECT i % 5, 5, 1 + i % 20000, 1 + (1 + i % 2000) % 200, 1 + i % 2000, now(), now()
+       FROM generate_series(1, 200000) AS i""",
+    """INSERT INTO result_question (id_result, question, answer_is_correct, created_at, updated_at)
+       SELECT 1 + i % 200000, '-', true, now(), now() FROM generate_series(1, 100000) AS i""",
+    """INSERT INTO user_answer (answer, id_result_question, created_at, updated_at)
+       SELECT '-', 1 + i % 100000, now(), now() FROM generate_series(1, 100000) AS i""",
+    """INSERT INTO average_score_company (id_user, id_company, rating, sum_correct, sum_questions, created_at, updated_at)
+       SELECT 1 + i % 20000, 1 + i / 20000, 0.5, 1, 2, now(), now() FROM generate_series(0, 39999) AS i""",
+    """INSERT INTO daily_score_rollup (id_company, id_user, id_quiz, day, sum_correct, sum_questions, created_at, updated_at)
+       SELECT 1 + (1 + i % 2000) % 200, 1 + i % 20000, 1 + i % 2000, current_date - i % 30, 1, 2, now(), now()
+       FROM generate_series(1, 60000) AS i""",
+    """INSERT INTO last_pass (id_user, id_quiz, id_company, passed_at, count_correct_answers, count_questions, created_at, updated_at)
+       SELECT 1 + i % 20000, 1 + i % 2000, 1 + (1 + i % 2000) % 200, now(), 1, 2, now(), now()
+       FROM generate_series(1, 20000) AS i""",
+    """INSERT INTO question_stat (id_question, id_quiz, id_company, attempts, correct, created_at, updated_at)
+       SELECT i, 1 + i % 2000, 1 + (1 + i % 2000) % 200, 2, 1, now(), now() FROM generate_series(1, 20000) AS i""",
+    """INSERT INTO answer_stat (id_answer, id_question, selections, created_at, updated_at)
+       SELECT i, 1 + i % 20000, 1, now(), now() FROM generate_series(1, 80000) AS i""",
+]
+
+# Filters used by get_by_fields/get_page call sites and by the relationship loading profiles
+PLAN_QUERIES = [
+    (ResultTestModel, {'id_user': 7, 'id_company': 8}),
+    (ResultTestModel, {'id_company': 8, 'id_quiz': 7}),
+    (ResultTestModel, {'id_user': 7, 'id_quiz': 7}),
+    (ResultTestModel, {'id_user': 7}),
+    (ResultTestModel, {'id_company': 8}),
+    (RoleModel, {'id_company': 8, 'id_user': 7}),
+    (RoleModel, {'id_company': 8}),
+    (RoleModel, {'id_user': 7}),
+    (NotificationModel, {'id_user': 7, 'status': StatusEnum.READ.value}),
+    (NotificationModel, {'id_user': 7}),
+    (AverageScoreCompanyModel, {'id_user': 7, 'id_company': 1}),
+    (AverageScoreCompanyModel, {'id_user': 7}),
+    (DailyScoreRollupModel, {'id_company': 8, 'id_user': 7}),
+    (DailyScoreRollupModel, {'id_company': 8}),
+    (DailyScoreRollupModel, {'id_user': 7, 'id_quiz': 7}),
+    (LastPassModel, {'id_user': 7}),
+    (LastPassModel, {'id_company': 8}),
+    (QuestionStatModel, {'id_company': 8, 'id_quiz': 7}),
+    (QuestionStatModel, {'id_company': 8}),
+    (AnswerStatModel, {'id_question': 7}),
+    (InvitationModel, {'id_user': 7}),
+    (InvitationModel, {'id_company': 8}),
+    (RequestModel, {'id_user': 7}),
+    (RequestModel, {'id_company': 8}),
+    (QuizModel, {'id_company': 8}),
+    (QuestionModel, {'id_quiz': 7}),
+    (AnswerModel, {'id_question': 7}),
+    (ResultQuestionModel, {'id_result': 7}),
+    (UserAnswerModel, {'id_result_question': 7}),
+]
+
+# Filters of the get_page call sites, every page has to be read in index order
+PAGE_QUERIES = [
+    (UserModel, {}),
+    (CompanyModel, {'is_hidden': False}),
+    (RoleModel, {'id_company': 8}),
+    (RoleModel, {'id_user': 7}),
+    (InvitationModel, {'id_company': 8}),
+    (InvitationModel, {'id_user': 7}),
+    (RequestModel, {'id_company': 8}),
+    (RequestModel, {'id_user': 7}),
+    (QuizModel, {'id_company': 8}),
+    (NotificationModel, {'id_user': 7}),
+]
+
+CURSOR_VALUES = {'id': 5, 'created_at': datetime(2023, 1, 1, tzinfo=timezone.utc)}
+
+
+def plan_nodes(plan: dict):
+    yield plan
+
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def seq_scans(plan: dict):
+    return [node['Relation Name'] for node in plan_nodes(plan) if node['Node Type'] == 'Seq Scan']
+
+
+async def explain(connection, query) -> dict:
+    query = query.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True})
+
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {query}")
+    plan = result.scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+
+    return plan[0]['Plan']
+
+
+@pytest.fixture(scope='module')
+async def plan_connection():
+    engine = create_async_engine(global_settings.postgresql_test_url, poolclass=NullPool)
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+
+        await conn.exec_driver_sql(f"CREATE SCHEMA {PLAN_SCHEMA}")
+        await conn.exec_driver_sql(f"SET LOCAL search_path TO {PLAN_SCHEMA}")
+        await conn.run_sync(metadata.create_all)
+
+        for statement in SEED:
+            await conn.exec_driver_sql(statement)
+
+        for table in metadata.sorted_tables:
+            await conn.exec_driver_sql(f'ANALYZE "{table.name}"')
+
+        yield conn
+
+        await transaction.rollback()
+
+    await engine.dispose()
+
+
+@pytest.mark.parametrize(
+    'model, fields',
+    PLAN_QUERIES,
+    ids=[f"{model.__tablename__}({','.join(fields)})" for model, fields in PLAN_QUERIES]
+)
+async def test_no_sequential_scan(plan_connection, model, fields):
+    plan = await explain(plan_connection, model.fields_query(**fields))
+
+    assert seq_scans(plan) == []
+
+
+@pytest.mark.parametrize('order_by', list(ORDER_KEYS))
+@pytest.mark.parametrize(
+    'model, fields',
+    PAGE_QUERIES,
+    ids=[f"{model.__tablename__}({','.join(fields)})" for model, fields in PAGE_QUERIES]
+)
+async def test_page_read_in_index_order(plan_connection, model, fields, order_by):
+    cursor = encode_cursor(order_by, [CURSOR_VALUES[key] for key in ORDER_KEYS[order_by]])
+
+    # With a handful of rows per filter value a bitmap scan plus a sort is the cheapest plan,
+    # with sorts disabled a Sort node is left only where no index returns rows in page order
+    await plan_connection.exec_driver_sql("SET LOCAL enable_sort = off")
+    try:
+        plan = await explain(plan_connection, model.page_query(cursor, 100, order_by, **fields))
+    finally:
+        await plan_connection.exec_driver_sql("SET LOCAL enable_sort = on")
+
+    assert seq_scans(plan) == []
+    assert [node for node in plan_nodes(plan) if node['Node Type'] in ('Sort', 'Incremental Sort')] == []